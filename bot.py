@@ -25,6 +25,8 @@ async def load_cogs():
     print("✅ Loaded calendar_cog.")
     await client.load_extension("cogs.student_verification")
     print("✅ Loaded student_verification cog.")
+    await client.load_extension("cogs.form_poller")
+    print("✅ Loaded form_poller cog.")
     await client.load_extension("cogs.shadowban")
     print("✅ Loaded shadowban cog.")
 
@@ -0,0 +1,240 @@
+"""Benchmarks for the calendar cog.
+
+Not a cog: run it from the repo root with
+
+    python -m cogs.calendar_bench --sizes 100 1000 10000 50000 --output bench.json
+
+It generates synthetic ICS feeds (all-day, timezoned, RRULE-heavy with EXDATEs, and
+events sitting on DST transitions), serves them from a local aiohttp server, and times
+CalendarCog.get_events_by_range, format_event_field and the weekly/day-before filters.
+Results are printed (and optionally written) as JSON so runs can be diffed over time.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import aiohttp
+import pytz
+from aiohttp import web
+
+from cogs import calendar_cog
+from utils.announced_store import AnnouncedStore
+
+BENCH_FORMAT_VERSION = 1
+EASTERN_VTIMEZONE = """BEGIN:VTIMEZONE
+TZID:Eastern Standard Time
+BEGIN:STANDARD
+DTSTART:16010101T020000
+TZOFFSETFROM:-0400
+TZOFFSETTO:-0500
+RRULE:FREQ=YEARLY;INTERVAL=1;BYDAY=1SU;BYMONTH=11
+END:STANDARD
+BEGIN:DAYLIGHT
+DTSTART:16010101T020000
+TZOFFSETFROM:-0500
+TZOFFSETTO:-0400
+RRULE:FREQ=YEARLY;INTERVAL=1;BYDAY=2SU;BYMONTH=3
+END:DAYLIGHT
+END:VTIMEZONE"""
+
+
+def generate_ics(count, seed=0, now=None):
+    """Synthetic feed with `count` VEVENTs spread over two years either side of `now`."""
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//NoleBot//calendar_bench//EN"]
+    lines.extend(EASTERN_VTIMEZONE.splitlines())
+    # DST transitions in the current year (second Sunday of March, first Sunday of November)
+    march = datetime(now.year, 3, 8) + timedelta(days=(6 - datetime(now.year, 3, 8).weekday()) % 7)
+    november = datetime(now.year, 11, 1) + timedelta(days=(6 - datetime(now.year, 11, 1).weekday()) % 7)
+
+    for i in range(count):
+        start = now + timedelta(days=rng.randint(-730, 730), hours=rng.randint(8, 22), minutes=rng.choice((0, 30)))
+        kind = i % 10
+        lines.append("BEGIN:VEVENT")
+        lines.append(f"UID:bench-{seed}-{i}@nolebot")
+        lines.append(f"SUMMARY:Synthetic event {i} " + "x" * rng.randint(0, 40))
+        if rng.random() < 0.5:
+            lines.append(f"LOCATION:Room {rng.randint(100, 400)}")
+        if kind < 3:
+            # All-day
+            lines.append(f"DTSTART;VALUE=DATE:{start:%Y%m%d}")
+        elif kind < 7:
+            # Timezoned, single occurrence
+            lines.append(f"DTSTART;TZID=Eastern Standard Time:{start:%Y%m%dT%H%M%S}")
+        elif kind < 9:
+            # Weekly recurrence with a couple of EXDATEs
+            lines.append(f"DTSTART;TZID=Eastern Standard Time:{start:%Y%m%dT%H%M%S}")
+            until = start + timedelta(weeks=rng.randint(4, 52))
+            lines.append(f"RRULE:FREQ=WEEKLY;UNTIL={until:%Y%m%dT%H%M%S}Z")
+            for skip in (2, 5):
+                lines.append(f"EXDATE;TZID=Eastern Standard Time:{start + timedelta(weeks=skip):%Y%m%dT%H%M%S}")
+        else:
+            # Daily at 02:30 across a DST boundary, where the wall time doesn't exist or repeats
+            edge = march if i % 20 == 9 else november
+            lines.append(f"DTSTART;TZID=Eastern Standard Time:{edge - timedelta(days=2):%Y%m%d}T023000")
+            lines.append("RRULE:FREQ=DAILY;COUNT=5")
+        lines.append("END:VEVENT")
+
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples, items=1):
+    """Latency stats in milliseconds plus throughput in items per second."""
+    total = sum(samples)
+    return {
+        "runs": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 4),
+        "p99_ms": round(percentile(samples, 99) * 1000, 4),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4),
+        "throughput_per_s": round(len(samples) * items / total, 2) if total else None,
+    }
+
+
+async def timed(coro_factory, runs):
+    samples = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = await coro_factory()
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+
+class StubBot:
+    async def wait_until_ready(self):
+        pass
+
+
+async def bench_size(count, runs, port, workdir):
+    body = generate_ics(count, seed=count)
+
+    async def serve(request):
+        return web.Response(text=body, content_type="text/calendar", headers={"ETag": f'"{count}"'})
+
+    app = web.Application()
+    app.router.add_get("/calendar.ics", serve)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+
+    # Point the cog at the local server and keep its state files out of json/
+    calendar_cog.ICS_SOURCES = {"bench": f"http://127.0.0.1:{port}/calendar.ics"}
+    calendar_cog.JSON_DIR = workdir
+    calendar_cog.CALENDAR_PROCESS_THRESHOLD = sys.maxsize  # Keep work in-process so tracemalloc sees it
+    calendar_cog.CALENDAR_PARSE_TIMEOUT = None  # Measure big feeds instead of abandoning them
+    calendar_cog.AnnouncedStore = lambda: AnnouncedStore(os.path.join(workdir, "announced.jsonl"), legacy_path=None)
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+
+    cog = calendar_cog.CalendarCog(StubBot())
+    cog.session = aiohttp.ClientSession()
+    result = {"events": count, "feed_bytes": len(body.encode("utf-8"))}
+    try:
+        now = datetime.now(pytz.utc)
+        month_start, month_end = now - timedelta(days=15), now + timedelta(days=15)
+
+        start = time.perf_counter()
+        month_events = await cog.get_events_by_range(month_start, month_end)
+        cold = time.perf_counter() - start
+        # Peak memory of a full parse + index build, measured separately since tracing skews timing
+        tracemalloc.start()
+        await cog.feeds["bench"].reparse()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["cold_fetch_and_index"] = {
+            "seconds": round(cold, 4),
+            "peak_mem_bytes": peak,
+            "occurrences": len(cog.index),
+        }
+
+        samples, _ = await timed(lambda: cog.get_events_by_range(month_start, month_end), runs)
+        result["get_events_by_range_month"] = summarize(samples)
+        result["get_events_by_range_month"]["events_returned"] = len(month_events)
+
+        year_start, year_end = now - timedelta(days=180), now + timedelta(days=180)
+        samples, year_events = await timed(lambda: cog.get_events_by_range(year_start, year_end), runs)
+        result["get_events_by_range_year"] = summarize(samples)
+        result["get_events_by_range_year"]["events_returned"] = len(year_events)
+
+        tracemalloc.start()
+        samples, _ = await timed(
+            lambda: cog.get_events_by_range(now, now + timedelta(days=2), streaming=True),
+            max(1, runs // 10)
+        )
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["get_events_by_range_streaming_48h"] = summarize(samples)
+        result["get_events_by_range_streaming_48h"]["peak_mem_bytes"] = peak
+
+        eastern_now = now.astimezone(pytz.timezone("US/Eastern"))
+        samples, _ = await timed(lambda: cog.get_week_events(eastern_now), runs)
+        result["weekly_filter"] = summarize(samples)
+        samples, _ = await timed(lambda: cog.get_tomorrow_events(eastern_now), runs)
+        result["day_before_filter"] = summarize(samples)
+
+        sample_events = year_events[:1000] or month_events
+        if sample_events:
+            start = time.perf_counter()
+            for event in sample_events:
+                calendar_cog.CalendarCog.format_event_field(event)
+            elapsed = time.perf_counter() - start
+            result["format_event_field"] = {
+                "fields": len(sample_events),
+                "mean_us": round(elapsed / len(sample_events) * 1e6, 3),
+                "throughput_per_s": round(len(sample_events) / elapsed, 2) if elapsed else None,
+            }
+    finally:
+        await cog.cog_unload()
+        await runner.cleanup()
+    return result
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the calendar cog against synthetic ICS feeds.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000],
+                        help="Number of VEVENTs per synthetic feed")
+    parser.add_argument("--runs", type=int, default=50, help="Timed repetitions per warm measurement")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the local ICS server")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = {
+        "format_version": BENCH_FORMAT_VERSION,
+        "timestamp": datetime.now(pytz.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [],
+    }
+    # The cog reports progress with print(); keep stdout for the JSON report
+    with tempfile.TemporaryDirectory(prefix="calendar_bench_") as workdir, contextlib.redirect_stdout(sys.stderr):
+        for count in args.sizes:
+            print(f"⏱️ Benchmarking {count} events...", file=sys.stderr)
+            report["results"].append(await bench_size(count, args.runs, args.port, workdir))
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
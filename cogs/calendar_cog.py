@@ -1,105 +1,197 @@
-import discord
 from discord.ext import commands, tasks
 import aiohttp
+import asyncio
 import pytz
 from datetime import datetime, timedelta, time
-import json
-from icalendar import Calendar
-from dateutil.rrule import rrulestr
+import os
+
+from utils.ics_feed import FeedCache
+from utils.persistence import JSON_DIR
+from utils.calendar_index import CalendarExecutor, OccurrenceIndex, merge_events
+from utils.scheduler import get_scheduler
+from utils.announced_store import AnnouncedStore
+from utils.event_render import EventRenderer
 
 ICS_URL = "https://outlook.office365.com/owa/calendar/30f33308faff4d53a3ea3afe1ed5fbad@fsu.edu/690a01fda04b4ec1a579221f653489bb7175071983823801560/calendar.ics"
+# Every feed listed here is fetched concurrently and merged into one event stream.
+# Add per-team or campus calendars as "name": "https://.../calendar.ics".
+ICS_SOURCES = {
+    "club": ICS_URL,
+}
 CHANNEL_ID = 1346069503863423059
 ROLE_ID = 1399528835837595689
 WEEKLY_EMBED_COLOR = 0xCEB888
 MORNING_EMBED_COLOR = 0x782F40
-DATA_FILE = "../json/calendar_announced.json"
-
-def ensure_timezone(dt):
-    if dt and not dt.tzinfo:
-        return pytz.utc.localize(dt)
-    return dt
+FEED_CACHE_TTL = 300  # Seconds before the ICS feed is revalidated with the server
+FEED_TIMEOUT = 15  # Seconds to wait on one source's download (not its parse) before using its cached copy
+HTTP_POOL_SIZE = 10  # Keep-alive connections shared by all sources
+CALENDAR_WORKERS = 2  # Threads (or processes, for big feeds) used to parse and expand the feed
+CALENDAR_PARSE_TIMEOUT = 30  # Seconds before a parse/expand job is abandoned
+CALENDAR_PROCESS_THRESHOLD = 1_000_000  # Feeds at least this many bytes are parsed in a process pool
+WEEKLY_ALERT_SPEC = "0 10 * * 1"  # Mondays at 10:00 AM Eastern
+DAY_BEFORE_ALERT_SPEC = "0 12 * * *"  # Every day at 12:00 PM Eastern
 
 class CalendarCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.announced = self.load_announced()
+        self.announced = AnnouncedStore()
+        self.executor = CalendarExecutor(
+            workers=CALENDAR_WORKERS,
+            timeout=CALENDAR_PARSE_TIMEOUT,
+            process_threshold=CALENDAR_PROCESS_THRESHOLD
+        )
+        self.feeds = {
+            name: FeedCache(
+                url,
+                os.path.join(JSON_DIR, f"calendar_feed_cache_{name}.json"),
+                ttl=FEED_CACHE_TTL,
+                parse=lambda body, name=name: self.build_index(name, body)
+            )
+            for name, url in ICS_SOURCES.items()
+        }
+        self.session = None
+        self.index = None
+        self.renderer = EventRenderer(self.format_event_field)
+        self._index_sources = []
+        self.scheduler = get_scheduler(bot)
         self.check_calendar.start()
-        self.send_weekly_alert.start()
-        self.send_day_before_alert.start()
 
-    def cog_unload(self):
+    async def cog_load(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=HTTP_POOL_SIZE, ttl_dns_cache=300)
+        )
+        self.scheduler.add_job("calendar_weekly_alert", WEEKLY_ALERT_SPEC, self.send_weekly_alert)
+        self.scheduler.add_job("calendar_day_before_alert", DAY_BEFORE_ALERT_SPEC, self.send_day_before_alert)
+
+    async def cog_unload(self):
         self.check_calendar.cancel()
-        self.send_weekly_alert.cancel()
-        self.send_day_before_alert.cancel()
+        self.scheduler.remove_job("calendar_weekly_alert")
+        self.scheduler.remove_job("calendar_day_before_alert")
+        self.executor.shutdown()
+        if self.session is not None:
+            await self.session.close()
+        # Write out anything still inside a debounce window
+        await self.announced.flush()
+        await self.scheduler.flush()
+        for feed in self.feeds.values():
+            await feed.flush()
+
+    async def build_index(self, name, body):
+        index = await OccurrenceIndex.build(self.executor, body)
+        print(f"📅 Rebuilt calendar index for '{name}' ({len(index)} occurrences)")
+        return index
+
+    async def fetch_source(self, name, feed):
+        """Index for one source, falling back to its last good copy if it is slow or down.
+
+        FEED_TIMEOUT covers only the download in fetch_source_body; building the index
+        from a large feed is bounded separately by CALENDAR_PARSE_TIMEOUT, so a slow
+        parse isn't mistaken for a dead server.
+        """
+        if await self.fetch_source_body(name, feed) is None:
+            return None
+        try:
+            # The feed is fresh now, so this only parses
+            index = await feed.get(self.session)
+            if index.is_stale():
+                index = await feed.reparse()
+            return index
+        except Exception as e:
+            print(f"⚠️ Could not index calendar source '{name}': {e!r}")
+            feed.defer()
+            return feed.parsed
 
-    def load_announced(self):
+    async def fetch_calendar(self):
+        """Return the merged occurrence index, revalidating each feed only once FEED_CACHE_TTL has passed."""
+        indexes = await asyncio.gather(*(self.fetch_source(name, feed) for name, feed in self.feeds.items()))
+        indexes = [index for index in indexes if index is not None]
+        unchanged = len(indexes) == len(self._index_sources) and all(
+            a is b for a, b in zip(indexes, self._index_sources)
+        )
+        if self.index is None or not unchanged:
+            self.index = await OccurrenceIndex.merge(self.executor, indexes)
+            self._index_sources = indexes
+            self.renderer.clear()
+        return self.index
+
+    async def fetch_source_body(self, name, feed):
+        """Raw ICS text for one source, or its cached copy if the server is slow or down."""
+        if feed.is_backing_off():
+            return None
         try:
-            with open(DATA_FILE, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {"weekly": [], "daybefore": []}
+            return await asyncio.wait_for(feed.refresh(self.session), timeout=FEED_TIMEOUT)
+        except Exception as e:
+            print(f"⚠️ Calendar source '{name}' unavailable: {e!r}")
+            feed.defer()
+            return feed.body
+
+    async def get_events_by_range(self, start_date, end_date, streaming=False):
+        """Occurrences from start_date (inclusive) up to end_date, sorted by start.
+
+        With streaming=True the feeds are scanned for just this window instead of using
+        the pre-expanded index, which keeps short lookups from paying for a full parse.
+        """
+        if streaming:
+            bodies = await asyncio.gather(*(self.fetch_source_body(name, feed) for name, feed in self.feeds.items()))
+            event_lists = await asyncio.gather(*(
+                self.executor.expand(body, start_date, end_date, streaming=True)
+                for body in bodies if body is not None
+            ))
+            return merge_events(event_lists)
+
+        index = await self.fetch_calendar()
+        if not index.covers(start_date, end_date):
+            # Outside the pre-expanded horizon, expand this range directly
+            event_lists = await asyncio.gather(*(
+                self.executor.expand(feed.body, start_date, end_date)
+                for feed in self.feeds.values() if feed.body is not None
+            ))
+            return merge_events(event_lists)
+        return index.between(start_date, end_date)
+
+    async def get_week_events(self, now):
+        """Events falling Monday through Sunday (Eastern) of the week containing `now`."""
+        eastern = pytz.timezone("US/Eastern")
+        today = now.date()
+        monday = today - timedelta(days=today.weekday())
+        week_start = datetime.combine(monday, time.min).replace(tzinfo=eastern)
+        week_end = datetime.combine(monday + timedelta(days=6), time.max).replace(tzinfo=eastern)
+        week_start_date = week_start.date()
+        week_end_date = week_end.date()
 
-    def save_announced(self):
-        with open(DATA_FILE, 'w') as f:
-            json.dump(self.announced, f, indent=2)
+        # Fetch a little extra in UTC to be sure
+        events = await self.get_events_by_range(
+            week_start.astimezone(pytz.utc) - timedelta(hours=6),
+            week_end.astimezone(pytz.utc) + timedelta(hours=6)
+        )
 
-    async def fetch_calendar(self):
-        async with aiohttp.ClientSession() as session:
-            async with session.get(ICS_URL) as resp:
-                return await resp.text()
+        # Filter in Eastern time using .date() comparison
+        filtered_events = []
+        for event in events:
+            event_time = event["begin"].astimezone(eastern)
+            event_date = event_time.date()
+            if week_start_date <= event_date <= week_end_date:
+                filtered_events.append(event)
+        return filtered_events
 
-    async def get_events_by_range(self, start_date, end_date):
-        data = await self.fetch_calendar()
-        cal = Calendar.from_ical(data)
-        events = []
+    async def get_tomorrow_events(self, now, streaming=False):
+        """Events on the Eastern calendar day after `now`."""
+        eastern = pytz.timezone("US/Eastern")
+        tomorrow = now.date() + timedelta(days=1)
 
-        for component in cal.walk():
-            if component.name != "VEVENT":
-                continue
-            summary = str(component.get('summary', 'Untitled Event'))
-            dtstart = component.get('dtstart')
-            dtend = component.get('dtend')
-            location = str(component.get('location', '')) if component.get('location') else None
-            uid = str(component.get('uid', summary + str(dtstart)))
-            all_day = False
-
-            if hasattr(dtstart, 'dt'):
-                dtstart = dtstart.dt
-                if isinstance(dtstart, datetime):
-                    dtstart = ensure_timezone(dtstart)
-                else:
-                    # It's a date (all-day event)
-                    all_day = True
-                    eastern = pytz.timezone("US/Eastern")
-                    dtstart = eastern.localize(datetime.combine(dtstart, time.min))
-            else:
-                continue
+        # Fetch events for the next 2 days (wide net, no UTC math for filtering)
+        events = await self.get_events_by_range(
+            now.astimezone(pytz.utc),
+            (now + timedelta(days=2)).astimezone(pytz.utc),
+            streaming=streaming
+        )
 
-            rrule = component.get('rrule')
-            if rrule:
-                rrule_bytes = component['rrule'].to_ical()
-                rrule_str = rrule_bytes.decode() if isinstance(rrule_bytes, bytes) else str(rrule_bytes)
-                if rrule_str.startswith("RRULE:"):
-                    rrule_str = rrule_str[len("RRULE:"):]
-                rule = rrulestr(rrule_str, dtstart=dtstart)
-                for occur in rule.between(start_date, end_date, inc=False):
-                    events.append({
-                        "name": summary,
-                        "begin": occur,
-                        "location": location,
-                        "uid": uid + str(occur),
-                        "all_day": all_day
-                    })
-            else:
-                # Non-recurring event
-                events.append({
-                    "name": summary,
-                    "begin": dtstart,
-                    "location": location,
-                    "uid": uid,
-                    "all_day": all_day
-                })
-        return events
+        filtered_events = []
+        for event in events:
+            event_time_eastern = event["begin"].astimezone(eastern)
+            if event_time_eastern.date() == tomorrow:
+                filtered_events.append(event)
+        return filtered_events
 
     @staticmethod
     def format_event_field(event):
@@ -116,6 +208,11 @@ class CalendarCog(commands.Cog):
             value += f"\n{location_line}"
         return value
 
+    async def send_events(self, channel, events, title, color, description=None, content=None):
+        """Send events as packed embeds: up to 10 per message, one API call for most months."""
+        for i, embeds in enumerate(self.renderer.render(events, title, color, description)):
+            await channel.send(content if i == 0 else None, embeds=embeds)
+
     @commands.command(name="debugevents")
     @commands.has_permissions(administrator=True)
     async def debug_events_command(self, ctx):
@@ -190,13 +287,12 @@ class CalendarCog(commands.Cog):
         if not filtered_events:
             await ctx.send("No events found for this month.")
             return
-        embed = discord.Embed(
+        await self.send_events(
+            ctx,
+            sorted(filtered_events, key=lambda e: e["begin"]),
             title=f"Events for {now.strftime('%B %Y')}",
             color=WEEKLY_EMBED_COLOR
         )
-        for event in sorted(filtered_events, key=lambda e: e["begin"]):
-            embed.add_field(name="", value=self.format_event_field(event), inline=False)
-        await ctx.send(embed=embed)
 
     @tasks.loop(hours=1)
     async def check_calendar(self):
@@ -204,86 +300,52 @@ class CalendarCog(commands.Cog):
         # Reserved for future hourly tasks if needed
         pass
 
-    @tasks.loop(minutes=1)
-    async def send_weekly_alert(self):
-        now = datetime.now(pytz.timezone("US/Eastern"))
-        if now.weekday() != 0 or now.hour != 10 or now.minute != 0:
-            return
+    async def send_weekly_alert(self, fire_time):
+        """Scheduled for WEEKLY_ALERT_SPEC; fire_time is when the run was due."""
+        now = fire_time.astimezone(pytz.timezone("US/Eastern"))
         await self.bot.wait_until_ready()
         channel = self.bot.get_channel(CHANNEL_ID)
         eastern = pytz.timezone("US/Eastern")
         today = now.date()
-        monday = today - timedelta(days=today.weekday())
-        week_start = datetime.combine(monday, time.min).replace(tzinfo=eastern)
-        week_end = datetime.combine(monday + timedelta(days=6), time.max).replace(tzinfo=eastern)
-        week_start_date = week_start.date()
-        week_end_date = week_end.date()
-
-        # Fetch a little extra in UTC to be sure
-        events = await self.get_events_by_range(
-            week_start.astimezone(pytz.utc) - timedelta(hours=6),
-            week_end.astimezone(pytz.utc) + timedelta(hours=6)
-        )
-
-        # Filter in Eastern time using .date() comparison
-        filtered_events = []
-        for event in events:
-            event_time = event["begin"].astimezone(eastern)
-            event_date = event_time.date()
-            if week_start_date <= event_date <= week_end_date:
-                filtered_events.append(event)
+        filtered_events = await self.get_week_events(now)
 
-        if not filtered_events:
+        new_events = [event for event in filtered_events if not self.announced.has("weekly", event["uid"])]
+        if not new_events:
             return
-        embed = discord.Embed(
+        await self.send_events(
+            channel,
+            new_events,
             title="This Week's Events",
             color=WEEKLY_EMBED_COLOR,
-            description="Here's what's happening this week:"
+            description="Here's what's happening this week:",
+            content=f"<@&{ROLE_ID}>"
         )
-        for event in filtered_events:
-            if event["uid"] in self.announced["weekly"]:
-                continue
-            embed.add_field(name="", value=self.format_event_field(event), inline=False)
-            self.announced["weekly"].append(event["uid"])
-        await channel.send(f"<@&{ROLE_ID}>", embed=embed)
-        self.save_announced()
+        for event in new_events:
+            self.announced.add("weekly", event["uid"], event["begin"].astimezone(eastern).date())
+        self.announced.expire(today)
 
-    @tasks.loop(minutes=1)
-    async def send_day_before_alert(self):
-        now = datetime.now(pytz.timezone("US/Eastern"))
-        if now.hour != 12 or now.minute != 0:
-            return
+    async def send_day_before_alert(self, fire_time):
+        """Scheduled for DAY_BEFORE_ALERT_SPEC; fire_time is when the run was due."""
+        now = fire_time.astimezone(pytz.timezone("US/Eastern"))
         await self.bot.wait_until_ready()
         channel = self.bot.get_channel(CHANNEL_ID)
-        eastern = pytz.timezone("US/Eastern")
         tomorrow = now.date() + timedelta(days=1)
+        filtered_events = await self.get_tomorrow_events(now)
 
-        # Fetch events for the next 2 days (wide net, no UTC math for filtering)
-        events = await self.get_events_by_range(
-            now.astimezone(pytz.utc),
-            (now + timedelta(days=2)).astimezone(pytz.utc)
-        )
-
-        filtered_events = []
-        for event in events:
-            event_time_eastern = event["begin"].astimezone(eastern)
-            if event_time_eastern.date() == tomorrow:
-                filtered_events.append(event)
-
-        if not filtered_events:
+        new_events = [event for event in filtered_events if not self.announced.has("daybefore", event["uid"])]
+        if not new_events:
             return
-        embed = discord.Embed(
+        await self.send_events(
+            channel,
+            new_events,
             title="Tomorrow's Events",
             color=MORNING_EMBED_COLOR,
-            description="Here's what's happening tomorrow:"
+            description="Here's what's happening tomorrow:",
+            content=f"<@&{ROLE_ID}>"
         )
-        for event in filtered_events:
-            if event["uid"] in self.announced.get("daybefore", []):
-                continue
-            embed.add_field(name="", value=self.format_event_field(event), inline=False)
-            self.announced.setdefault("daybefore", []).append(event["uid"])
-        await channel.send(f"<@&{ROLE_ID}>", embed=embed)
-        self.save_announced()
+        for event in new_events:
+            self.announced.add("daybefore", event["uid"], tomorrow)
+        self.announced.expire(now.date())
 
     @commands.command(name="testdaybefore")
     @commands.has_permissions(administrator=True)
@@ -294,31 +356,19 @@ class CalendarCog(commands.Cog):
     async def _send_day_before_alert_manual(self, ctx):
         now = datetime.now(pytz.timezone("US/Eastern"))
         channel = ctx.channel
-        eastern = pytz.timezone("US/Eastern")
-        tomorrow = now.date() + timedelta(days=1)
-
-        events = await self.get_events_by_range(
-            now.astimezone(pytz.utc),
-            (now + timedelta(days=2)).astimezone(pytz.utc)
-        )
-
-        filtered_events = []
-        for event in events:
-            event_time_eastern = event["begin"].astimezone(eastern)
-            if event_time_eastern.date() == tomorrow:
-                filtered_events.append(event)
+        filtered_events = await self.get_tomorrow_events(now, streaming=True)
 
         if not filtered_events:
             await ctx.send("No events found for tomorrow.")
             return
-        embed = discord.Embed(
+        await self.send_events(
+            channel,
+            filtered_events,
             title="Tomorrow's Events",
             color=MORNING_EMBED_COLOR,
-            description="Here's what's happening tomorrow:"
+            description="Here's what's happening tomorrow:",
+            content=f"<@&{ROLE_ID}>"
         )
-        for event in filtered_events:
-            embed.add_field(name="", value=self.format_event_field(event), inline=False)
-        await channel.send(f"<@&{ROLE_ID}>", embed=embed)
 
     @commands.command(name="testweekly")
     @commands.has_permissions(administrator=True)
@@ -329,39 +379,19 @@ class CalendarCog(commands.Cog):
     async def _send_weekly_alert_manual(self, ctx):
         now = datetime.now(pytz.timezone("US/Eastern"))
         channel = ctx.channel
-        eastern = pytz.timezone("US/Eastern")
-        today = now.date()
-        monday = today - timedelta(days=today.weekday())
-        week_start = datetime.combine(monday, time.min).replace(tzinfo=eastern)
-        week_end = datetime.combine(monday + timedelta(days=6), time.max).replace(tzinfo=eastern)
-        week_start_date = week_start.date()
-        week_end_date = week_end.date()
-
-        # Fetch a little extra in UTC to be sure
-        events = await self.get_events_by_range(
-            week_start.astimezone(pytz.utc) - timedelta(hours=6),
-            week_end.astimezone(pytz.utc) + timedelta(hours=6)
-        )
-
-        # Filter in Eastern time using .date() comparison
-        filtered_events = []
-        for event in events:
-            event_time = event["begin"].astimezone(eastern)
-            event_date = event_time.date()
-            if week_start_date <= event_date <= week_end_date:
-                filtered_events.append(event)
+        filtered_events = await self.get_week_events(now)
 
         if not filtered_events:
             await ctx.send("No events found for this week.")
             return
-        embed = discord.Embed(
+        await self.send_events(
+            channel,
+            filtered_events,
             title="This Week's Events",
             color=WEEKLY_EMBED_COLOR,
-            description="Here's what's happening this week:"
+            description="Here's what's happening this week:",
+            content=f"<@&{ROLE_ID}>"
         )
-        for event in filtered_events:
-            embed.add_field(name="", value=self.format_event_field(event), inline=False)
-        await channel.send(f"<@&{ROLE_ID}>", embed=embed)
 
 async def setup(bot):
     await bot.add_cog(CalendarCog(bot))
\ No newline at end of file
@@ -0,0 +1,92 @@
+import asyncio
+
+from discord.ext import commands
+
+from utils.verification_store import open_store
+from utils.form_submissions import EmailOutbox, FormPoller, PollSchedule, gmail_pool
+
+
+class FormPollerCog(commands.Cog):
+    """Runs the Google Form poller and the verification email outbox inside the bot.
+
+    Sheets reads and SMTP sends block, so both run in worker threads; everything
+    else stays on the bot's event loop. Codes that go out are handed straight to the
+    StudentVerification cog instead of going through the notification socket.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.store = open_store()
+        self.poller = FormPoller(self.store)
+        self.outbox = EmailOutbox(self.store, gmail_pool())
+        self.schedule = PollSchedule()
+        self.outbox_wakeup = asyncio.Event()
+        self.poll_task = None
+        self.outbox_task = None
+
+    async def cog_load(self):
+        await asyncio.to_thread(self.store.prune_outbox)
+        self.poll_task = self.bot.loop.create_task(self.poll_form())
+        self.outbox_task = self.bot.loop.create_task(self.deliver_outbox())
+
+    async def cog_unload(self):
+        self.poll_task.cancel()
+        self.outbox_task.cancel()
+        await asyncio.to_thread(self.outbox.mailer.close)
+
+    async def poll_form(self):
+        await self.bot.wait_until_ready()
+        while True:
+            print("🔁 Checking for new submissions...")
+            try:
+                queued = await asyncio.to_thread(self.poller.poll)
+            except Exception as e:
+                print(f"❌ Form poll failed: {e}")
+                self.schedule.record_error(e)
+            else:
+                self.schedule.record(queued)
+                if queued:
+                    self.outbox_wakeup.set()
+            await asyncio.sleep(self.schedule.next_delay())
+
+    async def deliver_outbox(self):
+        await self.bot.wait_until_ready()
+        while True:
+            # Cleared before sending so a poll that queues mid-batch still wakes us
+            self.outbox_wakeup.clear()
+            try:
+                delivered = await asyncio.to_thread(self.outbox.deliver_due)
+            except Exception as e:
+                print(f"❌ Outbox delivery failed: {e}")
+                delivered = []
+            for email in delivered:
+                await self.hand_off(email)
+            if delivered:
+                continue
+            try:
+                await asyncio.wait_for(self.outbox_wakeup.wait(), self.outbox.idle_timeout())
+            except asyncio.TimeoutError:
+                pass
+
+    @commands.command(name="pollstatus")
+    @commands.has_permissions(administrator=True)
+    async def poll_status(self, ctx):
+        """Show the form poller's current interval, hit rate and outbox backlog."""
+        stats = self.schedule.stats()
+        counts = await asyncio.to_thread(self.store.outbox_counts)
+        await ctx.send(
+            f"📋 Polling every ~{stats['interval']}s; {stats['hit_rate']:.0%} of the last {stats['polls']} polls "
+            f"found new submissions ({stats['quota_errors']} quota errors).\n"
+            f"📬 Outbox: {counts.get('pending', 0)} pending, {counts.get('sent', 0)} sent, {counts.get('dead', 0)} dead."
+        )
+
+    async def hand_off(self, email):
+        """Let the verification cog DM the student now that their code is live."""
+        verification = self.bot.get_cog("StudentVerification")
+        if verification is not None:
+            await verification.on_new_submission(email)
+        # Otherwise its reconciliation sweep picks the entry up once it's loaded
+
+
+async def setup(bot):
+    await bot.add_cog(FormPollerCog(bot))
@@ -1,9 +1,12 @@
 import discord
 from discord.ext import commands
+import asyncio
 import json
 import os
 from dotenv import load_dotenv
 
+from utils.role_index import RoleIndex
+
 # === Load config from JSON ===
 file_path = os.path.join(os.path.dirname(__file__), "..", "json", "assignable_roles.json")
 with open(os.path.abspath(file_path)) as f:
@@ -16,11 +19,67 @@ VERIFIED_STUDENT_ROLE_ID = int(os.getenv("VERIFIED_STUDENT_ROLE_ID"))
 
 ASSIGNABLE_ROLE_IDS = set(config["assignable_roles"])
 AUTHORIZED_ROLE_IDS = set(config["authorized_roles"])
+ROLE_ALIASES = config.get("role_aliases", {})  # Optional {"alias": role_id} shorthands for team names
 ALLOWED_CHANNEL_ID = 546878493200482314  # '#gms-assign-here'
+ROLE_EDIT_CONCURRENCY = 5  # Members edited at once; discord.py still waits out each route's rate limit
 
 class RoleAssignment(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.role_edit_semaphore = asyncio.Semaphore(ROLE_EDIT_CONCURRENCY)
+        # Guild ID -> RoleIndex, dropped whenever that guild's roles change
+        self.role_indexes = {}
+
+    def role_index(self, guild: discord.Guild) -> RoleIndex:
+        index = self.role_indexes.get(guild.id)
+        if index is None:
+            index = RoleIndex(guild.roles, ASSIGNABLE_ROLE_IDS, ROLE_ALIASES)
+            self.role_indexes[guild.id] = index
+        return index
+
+    def parse_args(self, ctx: commands.Context, args) -> tuple:
+        """Split args into (assignable roles, members, unknown-role warnings): roles first, then users."""
+        roles = []
+        members = []
+        unknown = []
+        found_user = False
+        for arg in args:
+            if not found_user and (arg.startswith("<@") and not arg.startswith("<@&")):
+                found_user = True
+            if found_user:
+                # User mention
+                member = ctx.guild.get_member(int(arg.strip("<@!>")))
+                if member:
+                    members.append(member)
+            elif arg.startswith("<@&") and arg.endswith(">"):
+                # Role mention
+                role = ctx.guild.get_role(int(arg.strip("<@&>")))
+                if role and role.id in ASSIGNABLE_ROLE_IDS:
+                    roles.append(role)
+            else:
+                # Role name, case-insensitive, or a unique prefix of one
+                role, suggestions = self.role_index(ctx.guild).lookup(arg)
+                if role:
+                    roles.append(role)
+                elif suggestions:
+                    unknown.append(f"❓ No assignable role `{arg}`. Did you mean: {', '.join(f'`{name}`' for name in suggestions)}?")
+                else:
+                    unknown.append(f"❓ No assignable role `{arg}`.")
+        # Keep the first occurrence of each role, e.g. when a name and its alias are both given
+        return list(dict.fromkeys(roles)), members, unknown
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role: discord.Role):
+        self.role_indexes.pop(role.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if before.name != after.name:
+            self.role_indexes.pop(after.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        self.role_indexes.pop(role.guild.id, None)
 
     def collect_members(self, ctx: commands.Context, *mentions) -> list:
         members = []
@@ -38,6 +97,62 @@ class RoleAssignment(commands.Cog):
 
     def is_verified(self, member: discord.Member) -> bool:
         return VERIFIED_STUDENT_ROLE_ID in [role.id for role in member.roles]
+
+    async def update_member_roles(self, member: discord.Member, roles: list, add: bool) -> list:
+        """Add (or remove) every role in `roles` that needs it with a single member edit.
+
+        `atomic=False` sends one PATCH with the final role list instead of one request per role.
+        """
+        if not self.is_verified(member):
+            action = "receive roles" if add else "have roles removed"
+            return [f"⚠️ {member.mention} must be a verified student to {action}."]
+
+        if not self.is_valid_nickname(member):
+            return [
+                f"⚠️ {member.mention} does not have a properly formatted nickname. "
+                f"Please tell them to use `FirstName | GamerTag` format, and then try again."
+            ]
+
+        results = []
+        changes = []
+        for role in roles:
+            if add and role in member.roles:
+                results.append(f"⚠️ {member.mention} already has `{role.name}`.")
+            elif not add and role not in member.roles:
+                results.append(f"⚠️ {member.mention} does not have `{role.name}`.")
+            else:
+                changes.append(role)
+        if not changes:
+            return results
+
+        try:
+            async with self.role_edit_semaphore:
+                if add:
+                    await member.add_roles(*changes, atomic=False)
+                else:
+                    await member.remove_roles(*changes, atomic=False)
+        except discord.Forbidden:
+            for role in changes:
+                if add:
+                    results.append(f"❌ I don’t have permission to assign `{role.name}` to {member.mention}.")
+                else:
+                    results.append(f"❌ I don’t have permission to remove `{role.name}` from {member.mention}.")
+        except Exception as e:
+            results.append(f"❌ Error for {member.mention}: {e}")
+        else:
+            for role in changes:
+                if add:
+                    results.append(f"✅ `{role.name}` assigned to {member.mention}.")
+                else:
+                    results.append(f"✅ `{role.name}` removed from {member.mention}.")
+        return results
+
+    async def update_members_roles(self, members: list, roles: list, add: bool) -> list:
+        """Run update_member_roles for every member concurrently; results keep member order."""
+        # A member mentioned twice would get two racing non-atomic edits, so dedupe first
+        members = list(dict.fromkeys(members))
+        per_member = await asyncio.gather(*(self.update_member_roles(member, roles, add) for member in members))
+        return [line for lines in per_member for line in lines]
     
     @commands.command(name="addrole")
     async def addrole(self, ctx: commands.Context, *args):
@@ -52,68 +167,18 @@ class RoleAssignment(commands.Cog):
             await ctx.send("❌ You must be a verified student to use this command.")
             return
 
-        # Split args into roles and members: roles first, then users
-        roles = []
-        members = []
-        found_user = False
-        for arg in args:
-            if not found_user and (arg.startswith("<@") and not arg.startswith("<@&")):
-                found_user = True
-            if found_user:
-                # User mention
-                member = ctx.guild.get_member(int(arg.strip("<@!>")))
-                if member:
-                    members.append(member)
-            else:
-                # Role mention or name
-                if arg.startswith("<@&") and arg.endswith(">"):
-                    role = ctx.guild.get_role(int(arg.strip("<@&>")))
-                    if role:
-                        roles.append(role)
-                else:
-                    role = discord.utils.get(ctx.guild.roles, name=arg)
-                    if role:
-                        roles.append(role)
-
-        # Filter only assignable roles
-        roles = [role for role in roles if role.id in ASSIGNABLE_ROLE_IDS]
+        roles, members, unknown = self.parse_args(ctx, args)
         if not roles:
-            await ctx.send(
+            await ctx.send("\n".join(unknown + [
                 "❌ Please specify at least one valid assignable team role.\n"
                 "If you think this is a mistake, please contact <@214151193998524416>."
-            )
+            ]))
             return
         if not members:
             await ctx.send("❌ Please mention at least one valid user.")
             return
 
-        results = []
-
-        for member in members:
-            if not self.is_verified(member):
-                results.append(f"⚠️ {member.mention} must be a verified student to receive roles.")
-                continue
-
-            if not self.is_valid_nickname(member):
-                results.append(
-                    f"⚠️ {member.mention} does not have a properly formatted nickname. "
-                    f"Please tell them to use `FirstName | GamerTag` format, and then try again."
-                )
-                continue
-
-            for role in roles:
-                if role in member.roles:
-                    results.append(f"⚠️ {member.mention} already has `{role.name}`.")
-                    continue
-
-                try:
-                    await member.add_roles(role)
-                    results.append(f"✅ `{role.name}` assigned to {member.mention}.")
-                except discord.Forbidden:
-                    results.append(f"❌ I don’t have permission to assign `{role.name}` to {member.mention}.")
-                except Exception as e:
-                    results.append(f"❌ Error for {member.mention}: {e}")
-
+        results = unknown + await self.update_members_roles(members, roles, add=True)
         await ctx.send("\n".join(results))
 
     @commands.command(name="delrole")
@@ -129,66 +194,18 @@ class RoleAssignment(commands.Cog):
             await ctx.send("❌ You must be a verified student to use this command.")
             return
 
-        # Split args into roles and members: roles first, then users
-        roles = []
-        members = []
-        found_user = False
-        for arg in args:
-            if not found_user and (arg.startswith("<@") and not arg.startswith("<@&")):
-                found_user = True
-            if found_user:
-                member = ctx.guild.get_member(int(arg.strip("<@!>")))
-                if member:
-                    members.append(member)
-            else:
-                if arg.startswith("<@&") and arg.endswith(">"):
-                    role = ctx.guild.get_role(int(arg.strip("<@&>")))
-                    if role:
-                        roles.append(role)
-                else:
-                    role = discord.utils.get(ctx.guild.roles, name=arg)
-                    if role:
-                        roles.append(role)
-
-        # Filter only assignable roles
-        roles = [role for role in roles if role.id in ASSIGNABLE_ROLE_IDS]
+        roles, members, unknown = self.parse_args(ctx, args)
         if not roles:
-            await ctx.send(
+            await ctx.send("\n".join(unknown + [
                 "❌ Please specify at least one valid assignable role to remove.\n"
                 "If you think this is a mistake, please contact <@214151193998524416>."
-            )
+            ]))
             return
         if not members:
             await ctx.send("❌ Please mention at least one valid user.")
             return
 
-        results = []
-
-        for member in members:
-            if not self.is_verified(member):
-                results.append(f"⚠️ {member.mention} must be a verified student to have roles removed.")
-                continue
-
-            if not self.is_valid_nickname(member):
-                results.append(
-                    f"⚠️ {member.mention} does not have a properly formatted nickname. "
-                    f"Please tell them to use `FirstName | GamerTag` format, and then try again."
-                )
-                continue
-
-            for role in roles:
-                if role not in member.roles:
-                    results.append(f"⚠️ {member.mention} does not have `{role.name}`.")
-                    continue
-
-                try:
-                    await member.remove_roles(role)
-                    results.append(f"✅ `{role.name}` removed from {member.mention}.")
-                except discord.Forbidden:
-                    results.append(f"❌ I don’t have permission to remove `{role.name}` from {member.mention}.")
-                except Exception as e:
-                    results.append(f"❌ Error for {member.mention}: {e}")
-
+        results = unknown + await self.update_members_roles(members, roles, add=False)
         await ctx.send("\n".join(results))
 
 # === Register the Cog ===
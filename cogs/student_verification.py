@@ -2,86 +2,74 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import os
-import json
-import time
-import shutil
-from datetime import datetime, timezone, timedelta
 import asyncio
-import re
+import time
+
+from utils.verification_store import CodeIndex, open_store
+from utils.verification_log import VerificationLog
+from utils.verification_ipc import serve_notifications
+from utils.dm_dispatcher import DMDispatcher, DMNotReady, PermanentDMFailure
 
 from dotenv import load_dotenv
 load_dotenv()
 SERVER_ID = int(os.getenv("SERVER_ID"))
 VERIFIED_STUDENT_ROLE_ID = int(os.getenv("VERIFIED_STUDENT_ROLE_ID"))
+RECONCILE_INTERVAL = 60  # Seconds between fallback sweeps for submissions we weren't notified about
+EXPIRY_MAX_SLEEP = 3600  # Upper bound on one expiry wait; new codes always expire after existing ones
 
 class StudentVerification(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # Shared with utils/form_verification_poller.py; imports verified.json on first run
+        self.store = open_store()
+        self.codes = CodeIndex(self.store)
+        self.verification_log = VerificationLog()
+        # Lowercase username -> Member for SERVER_ID, kept current by the listeners below
+        self.members_by_name = {}
+        self.members_indexed = False
+        self.dm_dispatcher = DMDispatcher(self.store, self.send_dm_reminder)
+        self.notification_server = None
 
     # ========== Utility Functions ==========
-    def load_verified_codes(self):
-        try:
-            with open('json/verified.json') as f:
-                data = json.load(f)
-            for email, entry in data.items():
-                if not isinstance(entry, dict) or 'code' not in entry or 'timestamp' not in entry:
-                    raise ValueError(f"Invalid entry format for {email}")
-        except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
-            print(f"⚠️ Error loading verified.json: {e}")
-            return {}
-        return data
-
-    def save_verified_codes(self, data):
-        json_path = 'json/verified.json'
-        backup_path = 'json/verified_backup.json'
-        tmp_path = 'json/verified.tmp'
-        try:
-            if os.path.exists(json_path):
-                shutil.copy(json_path, backup_path)
-            with open(tmp_path, 'w') as f:
-                json.dump(data, f, indent=2)
-            shutil.move(tmp_path, json_path)
-        except Exception as e:
-            print(f"❌ Failed to save verified.json safely: {e}")
-            raise e
-
     def log_verification_attempt(self, user, code, result):
-        now = datetime.now(timezone.utc)
-        cutoff = now - timedelta(days=3)
-        log_file = "verification.log"
+        # Buffered; flushed to logs/verification-YYYY-MM-DD.log in the background
+        self.verification_log.record(user, code, result)
 
-        timestamp_str = now.strftime('%Y-%m-%d %H:%M:%S')
-        new_line = f"[{timestamp_str} UTC] {user.name} ({user.id}) tried code '{code}': {result}\n"
+    def index_members(self, guild):
+        self.members_by_name = {member.name.lower(): member for member in guild.members}
+        self.members_indexed = True
+        print(f"👥 Indexed {len(self.members_by_name)} member names")
 
-        timestamp_pattern = re.compile(r"\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) UTC\]")
-
-        kept_lines = []
-        try:
-            with open(log_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    match = timestamp_pattern.search(line)
-                    if match:
-                        entry_time = datetime.strptime(match.group(1), '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
-                        if entry_time >= cutoff:
-                            kept_lines.append(line)
-        except FileNotFoundError:
-            pass
-
-        kept_lines.append(new_line)
-
-        with open(log_file, "w", encoding="utf-8") as f:
-            f.writelines(kept_lines)
+    def find_member_by_tag(self, guild, tag):
+        """Member whose username matches `tag` (case-insensitive), in O(1)."""
+        if not self.members_indexed:
+            self.index_members(guild)
+        return self.members_by_name.get(tag.strip().lower())
 
     def cleanup_expired_codes(self):
         """Remove codes older than 72 hours."""
-        now = time.time()
-        verified = self.load_verified_codes()
-        expired = [email for email, entry in verified.items() if now - entry['timestamp'] > 72 * 3600]
+        expired = self.store.delete_expired()
+        for email in expired:
+            print(f"🗑️ Removing expired code for {email}")
         if expired:
-            for email in expired:
-                print(f"🗑️ Removing expired code for {email}")
-                del verified[email]
-            self.save_verified_codes(verified)
+            self.store.prune_changes()
+
+    async def expire_codes(self):
+        """Delete codes as they expire, sleeping until the earliest remaining expiry.
+
+        The store keeps codes ordered by expires_at, so each wake-up touches only the
+        codes that are actually due rather than scanning everything stored.
+        """
+        while True:
+            try:
+                self.cleanup_expired_codes()
+                next_expiry = self.store.next_expiry()
+            except Exception as e:
+                # e.g. the database is locked; try again later rather than ending the task
+                print(f"❌ Expiring verification codes failed: {e}")
+                next_expiry = time.time() + RECONCILE_INTERVAL
+            delay = EXPIRY_MAX_SLEEP if next_expiry is None else next_expiry - time.time()
+            await asyncio.sleep(max(0, min(delay, EXPIRY_MAX_SLEEP)))
 
     # ========== Slash Command: /verify ==========
     @app_commands.command(
@@ -96,17 +84,8 @@ class StudentVerification(commands.Cog):
             self.log_verification_attempt(interaction.user, code, "❌ Used in server channel")
             return
 
-        verified = self.load_verified_codes()
-        matched_email = None
-
         # Check for code and username match (case-insensitive)
-        for email, entry in verified.items():
-            if entry['code'].lower() == code.lower():
-                expected_tag = entry.get("discord_tag", "").strip().lower()
-                actual_tag = interaction.user.name.lower()
-                if expected_tag == actual_tag:
-                    matched_email = email
-                    break
+        matched_email = self.codes.lookup(code, interaction.user.name)
 
         if matched_email is None:
             await interaction.followup.send("❌ Invalid, expired, or unauthorized verification code.")
@@ -140,63 +119,87 @@ class StudentVerification(commands.Cog):
         await interaction.followup.send(f"✅ Verification successful! Your email `{matched_email}` has been verified.")
         self.log_verification_attempt(interaction.user, code, f"✅ Verified successfully (email: {matched_email})")
 
-        # Failsafe: reload latest verified.json before deleting
-        latest_verified = self.load_verified_codes()
-        if matched_email in latest_verified:
-            del latest_verified[matched_email]
-            self.save_verified_codes(latest_verified)
+        # Atomic delete: the code can't be used again even if two /verify calls race
+        if self.store.consume(code, interaction.user.name) is not None:
             print(f"✅ Deleted used code for {matched_email}")
         else:
-            print(f"⚠️ Tried to delete {matched_email}, but it was not found in the latest file.")
+            print(f"⚠️ Tried to delete {matched_email}, but it was already removed.")
 
     # ========== Background DM Reminder Task ==========
+    async def send_dm_reminder(self, email, entry):
+        """DM the member who submitted the form for `email`.
+
+        Called by the dispatcher, which handles retries and marks the entry in the store.
+        """
+        guild = self.bot.get_guild(SERVER_ID)
+        if guild is None:
+            # Unavailable during an outage or reconnect; try again once it's back
+            raise DMNotReady("Server not found")
+        tag = entry.get("discord_tag", "").strip().lower()
+        member = self.find_member_by_tag(guild, tag)
+        if member is None:
+            raise PermanentDMFailure(f"No matching user for tag '{tag}'")
+        embed = discord.Embed(
+            title="FSU Esports Verification",
+            description=(
+                "Hi there! Thanks for submitting the FSU Esports student verification form.\n\n"
+                "We've sent a verification code to your FSU email address.\n\n"
+                "Please check your inbox (especially your junk folder—it loves to end up there!) "
+                "and then DM me: `/verify YOURCODE` to complete the process."
+            ),
+            color=0xCEB888
+        )
+        await member.send(embed=embed)
+        print(f"📩 Sent DM to {tag}")
+
+    async def on_new_submission(self, email):
+        """Called by the poller through the notification socket as soon as a code is stored."""
+        await self.bot.wait_until_ready()
+        self.dm_dispatcher.submit(email)
+
     async def send_dm_reminders(self):
+        """Reconciliation sweep: re-queues missed notifications, due retries and anything
+        left pending by a restart."""
         await self.bot.wait_until_ready()
         while not self.bot.is_closed():
-            self.cleanup_expired_codes()  # Remove expired codes every cycle
-            guild = self.bot.get_guild(SERVER_ID)
-            if guild is None:
-                print("⚠️ Server not found.")
-                await asyncio.sleep(5)
-                continue
-
-            verified = self.load_verified_codes()
-            changed = False
-
-            for email, entry in verified.items():
-                tag = entry.get("discord_tag", "").strip().lower()
-                if not tag or entry.get("dm_sent") is True or entry.get("dm_attempted") is True:
-                    continue
-
-                member = discord.utils.find(lambda m: m.name.lower() == tag, guild.members)
-                if member:
-                    try:
-                        embed = discord.Embed(
-                            title="FSU Esports Verification",
-                            description=(
-                                "Hi there! Thanks for submitting the FSU Esports student verification form.\n\n"
-                                "We've sent a verification code to your FSU email address.\n\n"
-                                "Please check your inbox (especially your junk folder—it loves to end up there!) "
-                                "and then DM me: `/verify YOURCODE` to complete the process."
-                            ),
-                            color=0xCEB888
-                        )
-                        await member.send(embed=embed)
-                        print(f"📩 Sent DM to {tag}")
-                        entry["dm_sent"] = True
-                        changed = True
-                    except Exception as e:
-                        print(f"⚠️ Could not DM {tag}: {e}")
-                        entry["dm_attempted"] = True
-                        changed = True
-                else:
-                    print(f"⚠️ No matching user for tag '{tag}' — will not retry.")
-                    entry["dm_attempted"] = True
-                    changed = True
-
-            if changed:
-                self.save_verified_codes(verified)
-            await asyncio.sleep(5)  # Check interval in seconds
+            try:
+                for email, _ in self.store.pending_dms():
+                    self.dm_dispatcher.submit(email)
+            except Exception as e:
+                print(f"❌ Verification DM sweep failed: {e}")
+            await asyncio.sleep(RECONCILE_INTERVAL)
+
+    # ========== Member Name Index ==========
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Also fires after reconnects, when the member cache may have been rebuilt
+        guild = self.bot.get_guild(SERVER_ID)
+        if guild is not None:
+            self.index_members(guild)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        if member.guild.id == SERVER_ID:
+            self.members_by_name[member.name.lower()] = member
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        if member.guild.id == SERVER_ID:
+            current = self.members_by_name.get(member.name.lower())
+            if current is not None and current.id == member.id:
+                del self.members_by_name[member.name.lower()]
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before, after):
+        if before.name == after.name:
+            return
+        current = self.members_by_name.get(before.name.lower())
+        if current is not None and current.id == before.id:
+            del self.members_by_name[before.name.lower()]
+        guild = self.bot.get_guild(SERVER_ID)
+        member = guild.get_member(after.id) if guild else None
+        if member is not None:
+            self.members_by_name[after.name.lower()] = member
 
     @commands.command()
     async def test(self, ctx):
@@ -204,8 +207,24 @@ class StudentVerification(commands.Cog):
         await ctx.send("Prefix commands are working.")
 
     async def cog_load(self):
-        # Start the background task
-        self.bot.loop.create_task(self.send_dm_reminders())
+        # Start the background tasks
+        self.verification_log.start()
+        self.dm_dispatcher.start()
+        try:
+            self.notification_server = await serve_notifications(self.on_new_submission)
+        except (OSError, NotImplementedError, AttributeError) as e:
+            # No Unix sockets here (e.g. Windows) or the path isn't writable
+            print(f"⚠️ Verification notifications unavailable, relying on the {RECONCILE_INTERVAL}s sweep: {e}")
+        self.reminder_task = self.bot.loop.create_task(self.send_dm_reminders())
+        self.expiry_task = self.bot.loop.create_task(self.expire_codes())
+
+    async def cog_unload(self):
+        self.reminder_task.cancel()
+        self.expiry_task.cancel()
+        if self.notification_server is not None:
+            self.notification_server.close()
+        await self.dm_dispatcher.close()
+        await self.verification_log.close()
 
 async def setup(bot):
     await bot.add_cog(StudentVerification(bot))
\ No newline at end of file
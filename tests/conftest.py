@@ -0,0 +1,5 @@
+import os
+import sys
+
+# cogs/ and utils/ are imported from the repo root, as when bot.py runs
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -0,0 +1,78 @@
+import json
+from datetime import date, timedelta
+
+from utils.announced_store import AnnouncedStore
+
+TODAY = date(2026, 10, 1)
+
+
+def journal_lines(path):
+    return path.read_text().splitlines()
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = tmp_path / "announced.jsonl"
+    store = AnnouncedStore(str(path), legacy_path=None)
+    store.add("weekly", "a", TODAY)
+    store.add("weekly", "a", TODAY)
+    store.add("daybefore", "b", TODAY)
+    assert len(journal_lines(path)) == 2
+
+    reopened = AnnouncedStore(str(path), legacy_path=None)
+    assert reopened.has("weekly", "a")
+    assert reopened.has("daybefore", "b")
+    assert not reopened.has("weekly", "b")
+
+
+def test_replay_skips_a_torn_last_line(tmp_path):
+    path = tmp_path / "announced.jsonl"
+    store = AnnouncedStore(str(path), legacy_path=None)
+    store.add("weekly", "a", TODAY)
+    with open(path, "a") as f:
+        f.write('{"kind": "weekly", "uid": "b", "da')
+
+    reopened = AnnouncedStore(str(path), legacy_path=None)
+    assert reopened.has("weekly", "a")
+    assert len(reopened) == 1
+
+
+def test_expire_drops_entries_past_retention(tmp_path):
+    store = AnnouncedStore(str(tmp_path / "announced.jsonl"), retention=timedelta(days=30), legacy_path=None)
+    store.add("weekly", "old", TODAY - timedelta(days=31))
+    store.add("weekly", "recent", TODAY - timedelta(days=30))
+    assert store.expire(today=TODAY) == 1
+    assert not store.has("weekly", "old")
+    assert store.has("weekly", "recent")
+
+
+def test_expire_compacts_a_mostly_dead_journal(tmp_path):
+    path = tmp_path / "announced.jsonl"
+    store = AnnouncedStore(str(path), retention=timedelta(days=30), legacy_path=None)
+    for i in range(150):
+        store.add("weekly", f"old{i}", TODAY - timedelta(days=60))
+    store.add("weekly", "live", TODAY)
+
+    # Few dead lines: nothing is rewritten yet
+    assert store.expire(today=TODAY - timedelta(days=40)) == 0
+    assert len(journal_lines(path)) == 151
+
+    assert store.expire(today=TODAY) == 150
+    assert [json.loads(line)["uid"] for line in journal_lines(path)] == ["live"]
+    # Appends after a compaction go on the end of the rewritten journal
+    store.add("daybefore", "next", TODAY)
+    reopened = AnnouncedStore(str(path), legacy_path=None)
+    assert len(reopened) == 2
+
+
+def test_legacy_file_is_imported_once(tmp_path):
+    path = tmp_path / "announced.jsonl"
+    legacy = tmp_path / "announced.json"
+    legacy.write_text(json.dumps({"weekly": ["a", "b"], "daybefore": ["c"]}))
+
+    store = AnnouncedStore(str(path), legacy_path=str(legacy))
+    assert len(store) == 3
+    assert len(journal_lines(path)) == 3
+
+    legacy.write_text(json.dumps({"weekly": ["ignored"]}))
+    reopened = AnnouncedStore(str(path), legacy_path=str(legacy))
+    assert not reopened.has("weekly", "ignored")
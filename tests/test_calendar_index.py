@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime
+
+import pytz
+
+from utils.calendar_index import CalendarExecutor, OccurrenceIndex, expand_feed, expand_feed_window
+
+EASTERN = pytz.timezone("US/Eastern")
+
+
+def feed(*vevents):
+    return "\r\n".join(["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//test//EN", *vevents, "END:VCALENDAR"]) + "\r\n"
+
+
+def vevent(uid, dtstart, rrule=None):
+    lines = ["BEGIN:VEVENT", f"UID:{uid}", f"SUMMARY:{uid}", f"DTSTART{dtstart}"]
+    if rrule:
+        lines.append(f"RRULE:{rrule}")
+    return "\r\n".join(lines + ["END:VEVENT"])
+
+
+def month_range(year, month):
+    """The window !getevents asks for: 00:00 Eastern on the 1st up to the next month."""
+    start = EASTERN.localize(datetime(year, month, 1))
+    end = EASTERN.localize(datetime(year, month + 1, 1))
+    return start.astimezone(pytz.utc), end.astimezone(pytz.utc)
+
+
+def names(events):
+    return [event["name"] for event in events]
+
+
+def test_all_day_event_on_first_of_month_is_included():
+    body = feed(vevent("kickoff", ";VALUE=DATE:20261001"))
+    start, end = month_range(2026, 10)
+    assert names(expand_feed(body, start, end)) == ["kickoff"]
+    assert names(expand_feed_window(body, start, end)) == ["kickoff"]
+
+
+def test_index_includes_occurrence_at_range_start():
+    body = feed(vevent("kickoff", ";VALUE=DATE:20261001"))
+    horizon_start = pytz.utc.localize(datetime(2026, 1, 1))
+    horizon_end = pytz.utc.localize(datetime(2027, 1, 1))
+    index = OccurrenceIndex(horizon_start, horizon_end, expand_feed(body, horizon_start, horizon_end))
+    start, end = month_range(2026, 10)
+    assert names(index.between(start, end)) == ["kickoff"]
+    # The end bound stays exclusive
+    assert index.between(*month_range(2026, 9)) == []
+
+
+def test_recurring_all_day_event_on_first_of_month_is_included():
+    body = feed(vevent("monthly", ";VALUE=DATE:20260601", "FREQ=MONTHLY;BYMONTHDAY=1"))
+    start, end = month_range(2026, 10)
+    events = expand_feed(body, start, end)
+    assert [event["begin"] for event in events] == [start]
+
+
+def build_index(body):
+    horizon_start = pytz.utc.localize(datetime(2026, 1, 1))
+    horizon_end = pytz.utc.localize(datetime(2027, 1, 1))
+    return OccurrenceIndex(horizon_start, horizon_end, expand_feed(body, horizon_start, horizon_end))
+
+
+def merge(indexes):
+    executor = CalendarExecutor(workers=1)
+    try:
+        return asyncio.run(OccurrenceIndex.merge(executor, indexes))
+    finally:
+        executor.shutdown()
+
+
+def test_merge_returns_a_single_index_unchanged():
+    index = build_index(feed(vevent("kickoff", ";VALUE=DATE:20261001")))
+    assert merge([index]) is index
+
+
+def test_merge_interleaves_sources_and_drops_duplicates():
+    club = build_index(feed(
+        vevent("late", ":20261020T180000Z"),
+        vevent("early", ":20261002T180000Z"),
+        vevent("shared", ":20261010T180000Z"),
+    ))
+    team = build_index(feed(vevent("middle", ":20261005T180000Z"), vevent("shared", ":20261010T180000Z")))
+    merged = merge([club, team])
+    assert names(merged.events) == ["early", "middle", "shared", "late"]
+    assert list(merged.starts) == sorted(merged.starts)
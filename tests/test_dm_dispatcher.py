@@ -0,0 +1,61 @@
+import asyncio
+
+import discord
+import pytest
+
+from utils.dm_dispatcher import DMDispatcher, DMNotReady
+from utils.verification_store import VerificationStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = VerificationStore(str(tmp_path / "verification.db"))
+    store.upsert("a@fsu.edu", "ABC123", "alice")
+    yield store
+    store.close()
+
+
+def run_dispatcher(store, send, **kwargs):
+    async def main():
+        dispatcher = DMDispatcher(store, send, workers=1, **kwargs)
+        dispatcher.start()
+        dispatcher.submit("a@fsu.edu")
+        for _ in range(200):
+            await asyncio.sleep(0.01)
+            entry = store.get("a@fsu.edu")
+            if entry["dm_sent"] or entry["dm_attempted"]:
+                break
+        await dispatcher.close()
+    asyncio.run(main())
+    return store.get("a@fsu.edu")
+
+
+def failing(error, times):
+    calls = []
+
+    async def send(email, entry):
+        calls.append(email)
+        if len(calls) <= times:
+            raise error
+    return send, calls
+
+
+def test_not_ready_is_retried_without_counting_attempts(store):
+    send, calls = failing(DMNotReady("Server not found", retry_after=0), times=3)
+    entry = run_dispatcher(store, send, max_attempts=2)
+    assert entry["dm_sent"] and not entry["dm_attempted"]
+    assert entry["dm_attempts"] == 0
+    assert len(calls) == 4
+
+
+def test_rate_limits_do_not_count_attempts(store):
+    send, calls = failing(discord.RateLimited(0), times=3)
+    entry = run_dispatcher(store, send, max_attempts=2)
+    assert entry["dm_sent"] and entry["dm_attempts"] == 0
+
+
+def test_transient_errors_give_up_after_max_attempts(store):
+    send, calls = failing(OSError("connection reset"), times=10)
+    entry = run_dispatcher(store, send, max_attempts=2, base_delay=0)
+    assert entry["dm_attempted"] and not entry["dm_sent"]
+    assert len(calls) == 2
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pytz
+
+from utils.event_render import (
+    EMBED_MAX_FIELDS, FIELD_VALUE_MAX, MESSAGE_MAX_CHARS, MESSAGE_MAX_EMBEDS, EventRenderer,
+)
+
+START = pytz.utc.localize(datetime(2026, 10, 1, 12))
+
+
+def events(count):
+    return [{"uid": f"event{i}", "begin": START + timedelta(hours=i), "name": f"Event {i}"} for i in range(count)]
+
+
+def message_chars(embeds):
+    return sum(len(embed.title or "") + len(embed.description or "") +
+               sum(len(field.value) for field in embed.fields) for embed in embeds)
+
+
+def test_fields_are_formatted_once_per_occurrence():
+    calls = []
+
+    def format_field(event):
+        calls.append(event["uid"])
+        return event["name"]
+
+    renderer = EventRenderer(format_field)
+    batch = events(3)
+    renderer.render(batch, "Week", 0)
+    renderer.render(batch[:2], "Tomorrow", 0)
+    assert calls == ["event0", "event1", "event2"]
+
+    renderer.clear()
+    renderer.render(batch[:1], "Week", 0)
+    assert calls[-1] == "event0" and len(calls) == 4
+
+
+def test_long_fields_are_truncated():
+    renderer = EventRenderer(lambda event: "x" * (FIELD_VALUE_MAX + 50))
+    value = renderer.field(events(1)[0])
+    assert len(value) == FIELD_VALUE_MAX and value.endswith("…")
+
+
+def test_embeds_split_at_the_field_limit():
+    messages = EventRenderer(lambda event: event["name"]).render(events(30), "Week", 0, description="Upcoming")
+    assert len(messages) == 1
+    first, second = messages[0]
+    assert len(first.fields) == EMBED_MAX_FIELDS and len(second.fields) == 5
+    assert first.title == "Week" and first.description == "Upcoming"
+    assert second.title is None
+
+
+def test_messages_split_at_the_embed_limit():
+    messages = EventRenderer(lambda event: event["name"]).render(events(251), "Week", 0)
+    assert [len(embeds) for embeds in messages] == [MESSAGE_MAX_EMBEDS, 1]
+    assert sum(len(embed.fields) for embeds in messages for embed in embeds) == 251
+
+
+def test_messages_split_at_the_character_budget():
+    messages = EventRenderer(lambda event: "x" * 1000).render(events(12), "T", 0)
+    # The title's one character pushes the sixth field out of the first message only
+    assert [sum(len(embed.fields) for embed in embeds) for embeds in messages] == [5, 6, 1]
+    assert all(message_chars(embeds) <= MESSAGE_MAX_CHARS for embeds in messages)
+    # Only the very first embed carries the title
+    assert [embeds[0].title for embeds in messages] == ["T", None, None]
+
+
+def test_no_events_renders_nothing():
+    assert EventRenderer(lambda event: event["name"]).render([], "Week", 0) == []
@@ -0,0 +1,21 @@
+from utils.form_submissions import CsvSource, column_letter
+
+
+def test_column_letter():
+    assert [column_letter(col) for col in (1, 26, 27, 52, 53, 702, 703)] == ["A", "Z", "AA", "AZ", "BA", "ZZ", "AAA"]
+
+
+def test_csv_source_numbers_rows_like_the_sheet(tmp_path):
+    path = tmp_path / "submissions.csv"
+    path.write_text(
+        "Timestamp,FSU Student Email,Discord Tag\n"
+        "08/25/2025 09:00:00,a@fsu.edu,alice\n"
+        "08/25/2025 09:00:01,b@fsu.edu\n"
+    )
+    source = CsvSource(str(path))
+    assert source.rows_after(1) == [
+        (2, {"Timestamp": "08/25/2025 09:00:00", "FSU Student Email": "a@fsu.edu", "Discord Tag": "alice"}),
+        (3, {"Timestamp": "08/25/2025 09:00:01", "FSU Student Email": "b@fsu.edu", "Discord Tag": ""}),
+    ]
+    assert [row for row, _ in source.rows_after(2)] == [3]
+    assert source.rows_after(3) == []
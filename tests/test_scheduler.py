@@ -0,0 +1,137 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from utils import scheduler as scheduler_module
+from utils.scheduler import CATCH_UP_WINDOW, CronSpec, Scheduler
+
+EASTERN = pytz.timezone("US/Eastern")
+
+
+def eastern(*args, is_dst=None):
+    return EASTERN.localize(datetime(*args), is_dst=is_dst)
+
+
+def utc(*args):
+    return pytz.utc.localize(datetime(*args))
+
+
+# ========== CronSpec ==========
+def test_weekday_only_spec_fires_on_mondays():
+    spec = CronSpec("0 10 * * 1")
+    # Thursday, October 1 2026
+    assert spec.next_after(eastern(2026, 10, 1, 12), EASTERN) == eastern(2026, 10, 5, 10)
+
+
+def test_sunday_is_both_0_and_7():
+    after = eastern(2026, 10, 1)
+    assert CronSpec("0 9 * * 0").next_after(after, EASTERN) == eastern(2026, 10, 4, 9)
+    assert CronSpec("0 9 * * 7").next_after(after, EASTERN) == eastern(2026, 10, 4, 9)
+
+
+def test_day_of_month_and_weekday_match_either():
+    # Standard cron: the 1st of the month OR any Monday
+    spec = CronSpec("0 12 1 * 1")
+    assert spec.next_after(eastern(2026, 9, 28, 13), EASTERN) == eastern(2026, 10, 1, 12)
+    assert spec.next_after(eastern(2026, 10, 1, 13), EASTERN) == eastern(2026, 10, 5, 12)
+
+
+def test_next_after_is_strictly_after():
+    spec = CronSpec("0 12 * * *")
+    assert spec.next_after(eastern(2026, 10, 1, 12), EASTERN) == eastern(2026, 10, 2, 12)
+
+
+def test_time_skipped_by_spring_forward_fires_after_the_jump():
+    # 02:30 doesn't exist on 2026-03-08; it fires at 03:30 EDT, the same instant as 02:30 EST
+    fire = CronSpec("30 2 * * *").next_after(eastern(2026, 3, 8, 0), EASTERN)
+    assert fire == utc(2026, 3, 8, 7, 30)
+    assert fire.strftime("%H:%M %Z") == "03:30 EDT"
+
+
+def test_time_repeated_by_fall_back_fires_once():
+    spec = CronSpec("30 1 * * *")
+    first = spec.next_after(eastern(2026, 11, 1, 0), EASTERN)
+    assert first == utc(2026, 11, 1, 5, 30)  # 01:30 EDT, the first pass
+    # Not again at 01:30 EST an hour later, but on the next day
+    assert spec.next_after(first, EASTERN) == eastern(2026, 11, 2, 1, 30)
+
+
+def test_steps_ranges_and_lists():
+    spec = CronSpec("*/15 9-10 * * 1,3")
+    assert spec.minutes == [0, 15, 30, 45]
+    assert spec.hours == [9, 10]
+    assert spec.weekdays == {0, 2}
+
+
+@pytest.mark.parametrize("expression", ["0 12 * *", "60 12 * * *", "0 12 31-1 * *", "*/0 * * * *"])
+def test_invalid_specs_are_rejected(expression):
+    with pytest.raises(ValueError):
+        CronSpec(expression)
+
+
+# ========== Scheduler catch-up ==========
+@pytest.fixture
+def frozen_now(monkeypatch):
+    """Returns a setter that pins datetime.now() inside utils.scheduler."""
+    now = {}
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now["value"].astimezone(tz) if tz else now["value"]
+
+    monkeypatch.setattr(scheduler_module, "datetime", FrozenDatetime)
+    return lambda value: now.__setitem__("value", value)
+
+
+def add_job_after_restart(tmp_path, spec, last_run):
+    state_path = tmp_path / "scheduler_state.json"
+    state_path.write_text(json.dumps({"job": last_run.isoformat()}))
+
+    async def noop(fire_time):
+        pass
+
+    async def main():
+        scheduler = Scheduler(EASTERN, state_path=str(state_path))
+        job = scheduler.add_job("job", spec, noop)
+        scheduler.remove_job("job")
+        return job.next_fire
+    return asyncio.run(main())
+
+
+def test_only_the_latest_missed_deadline_is_replayed(tmp_path, frozen_now):
+    frozen_now(eastern(2026, 10, 1, 15, 20))
+    # Down since 10:00: the 11:00 through 15:00 runs were missed; only 15:00 is replayed
+    next_fire = add_job_after_restart(tmp_path, "0 * * * *", eastern(2026, 10, 1, 10))
+    assert next_fire == eastern(2026, 10, 1, 15)
+
+
+def test_missed_deadline_older_than_catch_up_window_is_skipped(tmp_path, frozen_now):
+    now = eastern(2026, 10, 1, 20)
+    frozen_now(now)
+    assert now - eastern(2026, 10, 1, 12) > CATCH_UP_WINDOW
+    next_fire = add_job_after_restart(tmp_path, "0 12 * * *", eastern(2026, 9, 30, 12))
+    assert next_fire == eastern(2026, 10, 2, 12)
+
+
+def test_nothing_missed_schedules_the_next_deadline(tmp_path, frozen_now):
+    frozen_now(eastern(2026, 10, 1, 11))
+    next_fire = add_job_after_restart(tmp_path, "0 12 * * *", eastern(2026, 9, 30, 12))
+    assert next_fire == eastern(2026, 10, 1, 12)
+
+
+def test_first_start_doesnt_catch_up(tmp_path, frozen_now):
+    frozen_now(eastern(2026, 10, 1, 12, 30))
+
+    async def noop(fire_time):
+        pass
+
+    async def main():
+        scheduler = Scheduler(EASTERN, state_path=str(tmp_path / "missing.json"))
+        job = scheduler.add_job("job", "0 12 * * *", noop)
+        scheduler.remove_job("job")
+        return job.next_fire
+    assert asyncio.run(main()) == eastern(2026, 10, 2, 12)
@@ -0,0 +1,50 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from utils.verification_log import VerificationLog
+
+USER = SimpleNamespace(name="alice", id=1234)
+
+
+def test_records_are_appended_to_the_day_bucket(tmp_path):
+    log = VerificationLog(str(tmp_path))
+    log.record(USER, "ABC123", "✅ Verified")
+    log.flush()
+    log.record(USER, "XYZ789", "❌ Invalid code")
+    log.flush()
+    today = datetime.now(timezone.utc).date()
+    lines = (tmp_path / f"verification-{today.isoformat()}.log").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 2
+    assert "alice (1234) tried code 'ABC123'" in lines[0]
+
+
+def test_prune_drops_buckets_past_retention(tmp_path):
+    today = datetime.now(timezone.utc).date()
+    for age in (0, 3, 4):
+        (tmp_path / f"verification-{(today - timedelta(days=age)).isoformat()}.log").write_text("x\n")
+    (tmp_path / "unrelated.log").write_text("x\n")
+    VerificationLog(str(tmp_path), retention=timedelta(days=3)).flush()
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([
+        f"verification-{today.isoformat()}.log",
+        f"verification-{(today - timedelta(days=3)).isoformat()}.log",
+        "unrelated.log",
+    ])
+
+
+def test_idle_loop_does_no_io(tmp_path):
+    log = VerificationLog(str(tmp_path), flush_interval=0.01)
+    log.flush()  # Today's prune
+    flushes = []
+    log.flush = lambda: flushes.append(True)
+
+    async def main():
+        log.start()
+        await asyncio.sleep(0.1)
+        assert flushes == []
+        log.record(USER, "ABC123", "✅ Verified")
+        await asyncio.sleep(0.1)
+        log._task.cancel()
+
+    asyncio.run(main())
+    assert flushes
@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+
+import pytest
+
+from utils.verification_store import CODE_LIFETIME, CodeIndex, VerificationStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = VerificationStore(str(tmp_path / "verification.db"))
+    yield store
+    store.close()
+
+
+def write_json(path, data):
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+# ========== migrate_json ==========
+def test_migrate_imports_entries(store, tmp_path):
+    now = time.time()
+    verified = write_json(tmp_path / "verified.json", {
+        "a@fsu.edu": {"code": "ABC123", "timestamp": now, "discord_tag": "Alice", "dm_sent": True},
+    })
+    assert store.migrate_json(verified, str(tmp_path / "missing.json")) == 1
+    entry = store.get("a@fsu.edu")
+    assert entry["code"] == "ABC123"
+    assert entry["discord_tag"] == "Alice"
+    assert entry["dm_sent"] is True
+
+
+def test_migrate_accepts_numeric_tags_and_codes(store, tmp_path):
+    # gspread's get_all_records() turned all-digit values into ints
+    now = time.time()
+    verified = write_json(tmp_path / "verified.json", {
+        "a@fsu.edu": {"code": 123456, "timestamp": now, "discord_tag": 12345},
+    })
+    assert store.migrate_json(verified, str(tmp_path / "missing.json")) == 1
+    assert store.find("123456", "12345") == "a@fsu.edu"
+
+
+def test_migrate_skips_bad_entries_and_records_completion(store, tmp_path):
+    now = time.time()
+    verified = write_json(tmp_path / "verified.json", {
+        "good@fsu.edu": {"code": "GOOD01", "timestamp": now, "discord_tag": "good"},
+        "badtime@fsu.edu": {"code": "BAD001", "timestamp": "yesterday", "discord_tag": "bad"},
+        "nocode@fsu.edu": {"timestamp": now},
+        "notadict@fsu.edu": "ABC",
+    })
+    assert store.migrate_json(verified, str(tmp_path / "missing.json")) == 1
+    assert store.get("good@fsu.edu") is not None
+    assert store.get("badtime@fsu.edu") is None
+    # Recorded as done, so the next start doesn't retry (or fail) the import
+    assert store.migrate_json(verified, str(tmp_path / "missing.json")) == 0
+
+
+def test_migrate_reads_backup_only_when_main_file_missing(store, tmp_path):
+    now = time.time()
+    verified = write_json(tmp_path / "verified.json", {
+        "a@fsu.edu": {"code": "MAIN01", "timestamp": now, "discord_tag": "a"},
+    })
+    backup = write_json(tmp_path / "verified_backup.json", {
+        "used@fsu.edu": {"code": "USED01", "timestamp": now, "discord_tag": "u"},
+    })
+    assert store.migrate_json(verified, backup) == 1
+    assert store.get("used@fsu.edu") is None
+
+
+def test_migrate_falls_back_to_backup(tmp_path):
+    now = time.time()
+    store = VerificationStore(str(tmp_path / "verification.db"))
+    (tmp_path / "verified.json").write_text("{not json")
+    backup = write_json(tmp_path / "verified_backup.json", {
+        "a@fsu.edu": {"code": "BACK01", "timestamp": now, "discord_tag": "a"},
+    })
+    assert store.migrate_json(str(tmp_path / "verified.json"), backup) == 1
+    store.close()
+
+
+# ========== consume ==========
+def test_consume_is_case_insensitive_and_single_use(store):
+    store.upsert("a@fsu.edu", "ABC123", "Alice")
+    assert store.consume("abc123", "ALICE") == "a@fsu.edu"
+    assert store.consume("ABC123", "Alice") is None
+    assert store.get("a@fsu.edu") is None
+
+
+def test_consume_requires_matching_tag(store):
+    store.upsert("a@fsu.edu", "ABC123", "alice")
+    assert store.consume("ABC123", "mallory") is None
+    assert store.get("a@fsu.edu") is not None
+
+
+def test_consume_rejects_expired_codes(store):
+    store.upsert("a@fsu.edu", "ABC123", "alice", timestamp=time.time() - CODE_LIFETIME - 1)
+    assert store.consume("ABC123", "alice") is None
+
+
+def test_consume_races_have_one_winner(store):
+    store.upsert("a@fsu.edu", "ABC123", "alice")
+    results = []
+    barrier = threading.Barrier(8)
+
+    def attempt():
+        barrier.wait()
+        results.append(store.consume("ABC123", "alice"))
+
+    threads = [threading.Thread(target=attempt) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count("a@fsu.edu") == 1
+
+
+# ========== CodeIndex ==========
+def test_code_index_sees_writes_from_another_connection(store, tmp_path):
+    index = CodeIndex(store)
+    other = VerificationStore(store.path)
+    try:
+        other.upsert("a@fsu.edu", "ABC123", "Alice")
+        assert index.lookup("abc123", " alice ") == "a@fsu.edu"
+
+        other.upsert("a@fsu.edu", "NEW456", "Alice")
+        assert index.lookup("ABC123", "alice") is None
+        assert index.lookup("NEW456", "alice") == "a@fsu.edu"
+
+        other.delete("a@fsu.edu")
+        assert index.lookup("NEW456", "alice") is None
+    finally:
+        other.close()
+
+
+def test_code_index_checks_expiry(store):
+    index = CodeIndex(store)
+    store.upsert("a@fsu.edu", "ABC123", "alice")
+    assert index.lookup("ABC123", "alice", now=time.time() + CODE_LIFETIME + 1) is None
+
+
+def test_code_index_reloads_after_change_log_pruned(store):
+    index = CodeIndex(store)
+    store.upsert("a@fsu.edu", "ABC123", "alice")
+    assert index.lookup("ABC123", "alice") == "a@fsu.edu"
+    for i in range(20):
+        store.upsert(f"u{i}@fsu.edu", f"CODE{i:02d}", f"user{i}")
+    store.prune_changes(keep=1)
+    assert index.lookup("CODE05", "user5") == "u5@fsu.edu"
+    assert index.lookup("ABC123", "alice") == "a@fsu.edu"
@@ -0,0 +1,123 @@
+import json
+import os
+from datetime import date, timedelta
+
+from utils.persistence import JSON_DIR, DebouncedWriter, write_atomic
+
+ANNOUNCED_JOURNAL = os.path.join(JSON_DIR, "calendar_announced.jsonl")
+LEGACY_ANNOUNCED_FILE = os.path.join(JSON_DIR, "calendar_announced.json")
+ANNOUNCED_RETENTION = timedelta(days=30)  # Keep UIDs this long after their event date
+
+
+class AnnouncedStore:
+    """Which event UIDs have already been announced, per alert kind ("weekly", "daybefore").
+
+    Lookups are O(1) against in-memory dicts of uid -> event date. Every new UID is
+    appended to a JSON-lines journal; entries whose event date is older than the
+    retention window are dropped by `expire()`, which also compacts the journal once
+    it holds more dead lines than live ones. Appends and compactions are buffered and
+    written off-loop by a DebouncedWriter; `await flush()` on shutdown.
+    """
+
+    def __init__(self, path=ANNOUNCED_JOURNAL, retention=ANNOUNCED_RETENTION, legacy_path=LEGACY_ANNOUNCED_FILE):
+        self.path = path
+        self.retention = retention
+        self.entries = {}
+        self._journal_lines = 0
+        self._pending = []  # Journal lines not written yet
+        self._rewrite = False  # Next write replaces the journal instead of appending
+        self._writer = DebouncedWriter(self._snapshot, self._write, name=path)
+        if os.path.exists(path):
+            self._replay()
+        elif legacy_path and os.path.exists(legacy_path):
+            self._import_legacy(legacy_path)
+
+    def _replay(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                self._journal_lines += 1
+                try:
+                    record = json.loads(line)
+                    self.entries.setdefault(record["kind"], {})[record["uid"]] = date.fromisoformat(record["date"])
+                except (ValueError, KeyError) as e:
+                    # A crash mid-append can leave a torn last line; skip it
+                    print(f"⚠️ Skipping bad line in {self.path}: {e}")
+
+    def _import_legacy(self, legacy_path):
+        """One-time import of the old {"weekly": [...], "daybefore": [...]} file."""
+        try:
+            with open(legacy_path, "r") as f:
+                legacy = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"⚠️ Could not import {legacy_path}: {e}")
+            return
+        # The old file has no event dates, so age its UIDs from today
+        today = date.today()
+        for kind, uids in legacy.items():
+            for uid in uids:
+                self.entries.setdefault(kind, {})[uid] = today
+        self.compact()
+
+    def has(self, kind, uid):
+        return uid in self.entries.get(kind, ())
+
+    def add(self, kind, uid, event_date):
+        if self.has(kind, uid):
+            return
+        self.entries.setdefault(kind, {})[uid] = event_date
+        self._pending.append(json.dumps({"kind": kind, "uid": uid, "date": event_date.isoformat()}) + "\n")
+        self._journal_lines += 1
+        self._writer.mark_dirty()
+
+    def __len__(self):
+        return sum(len(uids) for uids in self.entries.values())
+
+    def expire(self, today=None):
+        """Forget UIDs whose event date is past the retention window; returns how many."""
+        cutoff = (today or date.today()) - self.retention
+        removed = 0
+        for uids in self.entries.values():
+            expired = [uid for uid, event_date in uids.items() if event_date < cutoff]
+            for uid in expired:
+                del uids[uid]
+            removed += len(expired)
+        if self._journal_lines > 2 * len(self) + 100:
+            self.compact()
+        return removed
+
+    def compact(self):
+        """Rewrite the journal with only the live entries."""
+        self._rewrite = True
+        self._pending = []
+        self._journal_lines = len(self)
+        self._writer.mark_dirty()
+
+    async def flush(self):
+        await self._writer.flush()
+
+    def _snapshot(self):
+        if self._rewrite:
+            self._rewrite = False
+            self._pending = []
+            return True, "".join(
+                json.dumps({"kind": kind, "uid": uid, "date": event_date.isoformat()}) + "\n"
+                for kind, uids in self.entries.items()
+                for uid, event_date in uids.items()
+            )
+        pending, self._pending = self._pending, []
+        return False, "".join(pending)
+
+    def _write(self, snapshot):
+        rewrite, text = snapshot
+        try:
+            if rewrite:
+                write_atomic(self.path, text)
+            else:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(text)
+                    f.flush()
+                    os.fsync(f.fileno())
+        except OSError:
+            # The buffered lines are gone; the in-memory entries are complete, so rewrite next time
+            self._rewrite = True
+            raise
@@ -0,0 +1,277 @@
+import asyncio
+import heapq
+import io
+import re
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, time
+
+import pytz
+from dateutil.rrule import rrulestr
+from icalendar import Calendar
+
+INDEX_HORIZON = timedelta(days=365)  # Occurrences are expanded this far either side of build time
+INDEX_MAX_AGE = timedelta(days=30)   # Re-center the horizon after this long even if the feed is unchanged
+WINDOW_SLACK = timedelta(days=1)     # Covers TZID offsets we don't resolve while pre-filtering VEVENTs
+
+ICS_DATE_PATTERN = re.compile(r"(\d{8})(?:T(\d{6}))?")
+
+
+def ensure_timezone(dt):
+    if dt and not dt.tzinfo:
+        return pytz.utc.localize(dt)
+    return dt
+
+
+def expand_events(cal, start_date, end_date):
+    """Expand every VEVENT in `cal` into occurrence records between start_date and end_date."""
+    events = []
+
+    for component in cal.walk():
+        if component.name != "VEVENT":
+            continue
+        summary = str(component.get('summary', 'Untitled Event'))
+        dtstart = component.get('dtstart')
+        location = str(component.get('location', '')) if component.get('location') else None
+        uid = str(component.get('uid', summary + str(dtstart)))
+        all_day = False
+
+        if hasattr(dtstart, 'dt'):
+            dtstart = dtstart.dt
+            if isinstance(dtstart, datetime):
+                dtstart = ensure_timezone(dtstart)
+            else:
+                # It's a date (all-day event)
+                all_day = True
+                eastern = pytz.timezone("US/Eastern")
+                dtstart = eastern.localize(datetime.combine(dtstart, time.min))
+        else:
+            continue
+
+        rrule = component.get('rrule')
+        if rrule:
+            rrule_bytes = component['rrule'].to_ical()
+            rrule_str = rrule_bytes.decode() if isinstance(rrule_bytes, bytes) else str(rrule_bytes)
+            if rrule_str.startswith("RRULE:"):
+                rrule_str = rrule_str[len("RRULE:"):]
+            rule = rrulestr(rrule_str, dtstart=dtstart)
+            # Half-open [start_date, end_date), like the one-off check below, so an
+            # all-day occurrence at exactly start_date (midnight on the 1st) is kept
+            for occur in rule.between(start_date, end_date, inc=True):
+                if occur == end_date:
+                    continue
+                events.append({
+                    "name": summary,
+                    "begin": occur,
+                    "location": location,
+                    "uid": uid + str(occur),
+                    "all_day": all_day
+                })
+        elif start_date <= dtstart < end_date:
+            # Non-recurring event
+            events.append({
+                "name": summary,
+                "begin": dtstart,
+                "location": location,
+                "uid": uid,
+                "all_day": all_day
+            })
+    return events
+
+
+def expand_feed(body, start_date, end_date):
+    """Parse raw ICS text and expand it, returning plain picklable records in start order.
+
+    This is the unit of work handed to CalendarExecutor, so it must stay a module-level
+    function and only return builtins and UTC datetimes.
+    """
+    events = expand_events(Calendar.from_ical(body), start_date, end_date)
+    for event in events:
+        event["begin"] = event["begin"].astimezone(pytz.utc)
+    events.sort(key=lambda e: e["begin"])
+    return events
+
+
+def merge_events(event_lists):
+    """Merge start-ordered occurrence lists from several feeds, de-duplicated on UID + start."""
+    if len(event_lists) == 1:
+        return event_lists[0]
+    seen = set()
+    merged = []
+    for event in heapq.merge(*event_lists, key=lambda e: e["begin"]):
+        key = (event["uid"], event["begin"].timestamp())
+        if key in seen:
+            continue
+        seen.add(key)
+        merged.append(event)
+    return merged
+
+
+def _parse_ics_instant(value):
+    """Best-effort UTC datetime for a DTSTART/UNTIL value, ignoring any TZID."""
+    match = ICS_DATE_PATTERN.match(value)
+    if not match:
+        return None
+    day, clock = match.groups()
+    return pytz.utc.localize(datetime.strptime(day + (clock or "000000"), "%Y%m%d%H%M%S"))
+
+
+def _vevent_in_window(lines, start_date, end_date):
+    """Whether an unparsed VEVENT could have an occurrence between start_date and end_date."""
+    dtstart = None
+    rrule = None
+    for line in lines:
+        name, _, value = line.partition(":")
+        name = name.split(";", 1)[0].upper()
+        if name == "DTSTART":
+            dtstart = _parse_ics_instant(value)
+        elif name == "RRULE":
+            rrule = value.upper()
+    if dtstart is None:
+        return True
+    if dtstart > end_date + WINDOW_SLACK:
+        return False
+    if rrule is None:
+        return dtstart >= start_date - WINDOW_SLACK
+    until = re.search(r"UNTIL=([0-9TZ]+)", rrule)
+    if until:
+        until_dt = _parse_ics_instant(until.group(1))
+        if until_dt is not None and until_dt < start_date - WINDOW_SLACK:
+            return False
+    return True
+
+
+def _unfolded_lines(body):
+    """Yield ICS content lines with RFC 5545 line folding undone."""
+    current = None
+    for raw in io.StringIO(body):
+        raw = raw.rstrip("\r\n")
+        if raw[:1] in (" ", "\t") and current is not None:
+            current += raw[1:]
+            continue
+        if current is not None:
+            yield current
+        current = raw
+    if current is not None:
+        yield current
+
+
+def expand_feed_window(body, start_date, end_date):
+    """Like expand_feed, but only materializes VEVENTs that can land in the window.
+
+    The feed is scanned line by line; each VEVENT is pre-filtered on its raw DTSTART
+    and RRULE UNTIL, and only the survivors (plus VTIMEZONE and calendar headers) are
+    handed to icalendar. Cost follows the window, not the feed's history.
+    """
+    kept = []
+    event = None
+    for line in _unfolded_lines(body):
+        upper = line.upper()
+        if upper == "BEGIN:VEVENT":
+            event = [line]
+        elif event is not None:
+            event.append(line)
+            if upper == "END:VEVENT":
+                if _vevent_in_window(event, start_date, end_date):
+                    kept.extend(event)
+                event = None
+        else:
+            kept.append(line)
+    return expand_feed("\r\n".join(kept) + "\r\n", start_date, end_date)
+
+
+class CalendarExecutor:
+    """Runs ICS parsing and RRULE expansion off the event loop.
+
+    Feeds smaller than `process_threshold` bytes go to a thread pool; larger ones go to a
+    process pool so a multi-megabyte parse can't hold the GIL against the gateway.
+    """
+
+    def __init__(self, workers=2, timeout=30, process_threshold=1_000_000):
+        self.workers = workers
+        self.timeout = timeout
+        self.process_threshold = process_threshold
+        self._threads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="calendar")
+        self._processes = None
+
+    def _pool_for(self, body):
+        if len(body) < self.process_threshold:
+            return self._threads
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(max_workers=self.workers)
+        return self._processes
+
+    async def expand(self, body, start_date, end_date, streaming=False):
+        loop = asyncio.get_running_loop()
+        work = expand_feed_window if streaming else expand_feed
+        future = loop.run_in_executor(self._pool_for(body), work, body, start_date, end_date)
+        return await asyncio.wait_for(future, timeout=self.timeout)
+
+    async def run(self, func, *args):
+        """Run other CPU-bound calendar work (e.g. merging indexes) in the thread pool."""
+        future = asyncio.get_running_loop().run_in_executor(self._threads, func, *args)
+        return await asyncio.wait_for(future, timeout=self.timeout)
+
+    def shutdown(self):
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+
+
+class OccurrenceIndex:
+    """All occurrences of one feed version, sorted by start time.
+
+    Built from the raw feed body whenever FeedCache sees new content.
+    Recurrences are expanded once over [built_at - INDEX_HORIZON, built_at + INDEX_HORIZON]
+    and range queries are answered with a bisect over the start timestamps.
+    """
+
+    def __init__(self, horizon_start, horizon_end, events):
+        # `events` must already be in start order, as expand_feed and merge_events return them
+        self.horizon_start = horizon_start
+        self.horizon_end = horizon_end
+        self.built_at = datetime.now(pytz.utc)
+        self.starts = array('d', (e["begin"].timestamp() for e in events))
+        self.events = events
+
+    @classmethod
+    async def build(cls, executor, body, now=None):
+        now = now or datetime.now(pytz.utc)
+        horizon_start = now - INDEX_HORIZON
+        horizon_end = now + INDEX_HORIZON
+        events = await executor.expand(body, horizon_start, horizon_end)
+        return cls(horizon_start, horizon_end, events)
+
+    @classmethod
+    async def merge(cls, executor, indexes):
+        """Combine per-feed indexes; the result only covers the horizon they all share.
+
+        A single index is returned as is. Merging several runs on `executor`, since a
+        large feed's occurrences take long enough to merge to stall the gateway.
+        """
+        if not indexes:
+            now = datetime.now(pytz.utc)
+            return cls(now, now, [])
+        if len(indexes) == 1:
+            return indexes[0]
+        horizon_start = max(index.horizon_start for index in indexes)
+        horizon_end = min(index.horizon_end for index in indexes)
+        return await executor.run(
+            lambda: cls(horizon_start, horizon_end, merge_events([index.events for index in indexes]))
+        )
+
+    def is_stale(self):
+        return datetime.now(pytz.utc) - self.built_at >= INDEX_MAX_AGE
+
+    def covers(self, start_date, end_date):
+        return self.horizon_start <= start_date and end_date <= self.horizon_end
+
+    def between(self, start_date, end_date):
+        """Occurrences from start_date (inclusive) up to end_date, in start order."""
+        lo = bisect_left(self.starts, start_date.timestamp())
+        hi = bisect_left(self.starts, end_date.timestamp(), lo)
+        return self.events[lo:hi]
+
+    def __len__(self):
+        return len(self.events)
@@ -0,0 +1,165 @@
+import asyncio
+import random
+import time
+
+import aiohttp
+import discord
+
+DM_WORKERS = 16  # Tasks pulling emails off the queue
+DM_CONCURRENCY = 8  # member.send calls allowed in flight at once
+DM_MAX_ATTEMPTS = 5
+DM_BASE_DELAY = 2  # Seconds; doubled per attempt before jitter
+DM_MAX_DELAY = 15 * 60
+DM_NOT_READY_DELAY = 60  # Seconds before retrying a DM the bot couldn't attempt yet
+
+
+class PermanentDMFailure(Exception):
+    """Raised by a send callback when retrying can't help (e.g. no matching member)."""
+
+
+class DMNotReady(Exception):
+    """Raised by a send callback when the bot can't attempt the DM yet (e.g. the guild
+    is unavailable during a reconnect); retried later without counting an attempt."""
+
+    def __init__(self, message, retry_after=DM_NOT_READY_DELAY):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def rate_limit_delay(error):
+    """Seconds Discord asked us to wait, or None if `error` isn't a rate limit."""
+    if isinstance(error, discord.RateLimited):
+        return error.retry_after
+    if isinstance(error, discord.HTTPException) and error.status == 429:
+        headers = getattr(error.response, "headers", {}) or {}
+        for header in ("Retry-After", "X-RateLimit-Reset-After"):
+            try:
+                return float(headers[header])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return DM_BASE_DELAY
+    return None
+
+
+def is_transient(error):
+    if isinstance(error, discord.HTTPException):
+        return error.status >= 500
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, OSError))
+
+
+class DMDispatcher:
+    """Sends verification reminder DMs from a bounded pool of workers.
+
+    The queue itself lives in the verification store: anything with dm_sent and
+    dm_attempted unset and dm_next_at in the past is pending, so a restart simply
+    re-submits `store.pending_dms()`. Failures are sorted three ways:
+
+    - rate limits pause every worker until Discord's Retry-After has passed, since
+      DM channel creation shares one bucket across recipients; like DMNotReady they
+      are retried without counting against the DM's attempts;
+    - transient errors (5xx, network) are retried with full-jitter exponential
+      backoff, recorded in dm_attempts/dm_next_at, up to DM_MAX_ATTEMPTS;
+    - Forbidden (DMs closed) and PermanentDMFailure give up straight away.
+    """
+
+    def __init__(self, store, send, workers=DM_WORKERS, concurrency=DM_CONCURRENCY,
+                 max_attempts=DM_MAX_ATTEMPTS, base_delay=DM_BASE_DELAY, max_delay=DM_MAX_DELAY):
+        self.store = store
+        self.send = send  # async send(email, entry)
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._queue = asyncio.Queue()
+        self._queued = set()
+        self._tasks = []
+        self._retries = set()
+        self._resume_at = 0.0
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self._tasks + list(self._retries):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._retries, return_exceptions=True)
+        self._tasks = []
+        self._retries.clear()
+
+    def submit(self, email):
+        """Queue `email` unless it's already waiting or being sent."""
+        if email in self._queued:
+            return
+        self._queued.add(email)
+        self._queue.put_nowait(email)
+
+    def backoff(self, attempts):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempts))
+
+    async def _worker(self):
+        while True:
+            email = await self._queue.get()
+            try:
+                await self._deliver(email)
+            except Exception as e:
+                print(f"⚠️ DM dispatcher error for {email}: {e}")
+            finally:
+                self._queued.discard(email)
+                self._queue.task_done()
+
+    async def _deliver(self, email):
+        # Re-read so a code consumed, expired or already rescheduled while queued isn't DMed
+        entry = self.store.get(email)
+        if not entry or entry["dm_sent"] or entry["dm_attempted"] or entry["dm_next_at"] > time.time():
+            return
+
+        pause = self._resume_at - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+        try:
+            async with self._semaphore:
+                await self.send(email, entry)
+        except (discord.Forbidden, PermanentDMFailure) as e:
+            print(f"⚠️ Could not DM {entry['discord_tag']}: {e} — will not retry.")
+            self.store.mark_dm(email, sent=False)
+            return
+        except Exception as e:
+            retry_after = rate_limit_delay(e)
+            # A 429 or an unavailable guild says nothing about this DM, so only real failures count
+            counted = False
+            if retry_after is not None:
+                self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+                delay = retry_after
+            elif isinstance(e, DMNotReady):
+                delay = e.retry_after
+            elif is_transient(e):
+                delay = self.backoff(entry["dm_attempts"])
+                counted = True
+            else:
+                print(f"⚠️ Could not DM {entry['discord_tag']}: {e} — will not retry.")
+                self.store.mark_dm(email, sent=False)
+                return
+
+            if counted and entry["dm_attempts"] + 1 >= self.max_attempts:
+                print(f"⚠️ Giving up on DM to {entry['discord_tag']} after {self.max_attempts} attempts: {e}")
+                self.store.mark_dm(email, sent=False)
+                return
+            self.store.schedule_dm_retry(email, time.time() + delay, str(e), count=counted)
+            print(f"🔁 DM to {entry['discord_tag']} failed ({e}); retrying in {delay:.1f}s")
+            self._schedule_retry(email, delay)
+            return
+
+        self.store.mark_dm(email, sent=True)
+
+    def _schedule_retry(self, email, delay):
+        async def retry():
+            # Slightly past dm_next_at, so _deliver sees the entry as due
+            await asyncio.sleep(delay + 0.1)
+            self.submit(email)
+
+        task = asyncio.create_task(retry())
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
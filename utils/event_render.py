@@ -0,0 +1,79 @@
+from collections import OrderedDict
+
+import discord
+
+# Discord limits: https://discord.com/developers/docs/resources/message#embed-object-embed-limits
+EMBED_MAX_FIELDS = 25
+FIELD_VALUE_MAX = 1024
+MESSAGE_MAX_EMBEDS = 10
+MESSAGE_MAX_CHARS = 6000  # Shared by every embed in one message
+
+
+class EventRenderer:
+    """Caches formatted event fields and packs them into as few messages as possible.
+
+    Fields are keyed on (uid, occurrence start, all_day), so the same occurrence showing
+    up in the weekly alert, the day-before alert and !getevents is formatted once.
+    Call `clear()` when the feed changes so renamed events aren't served stale.
+    """
+
+    def __init__(self, format_field, max_cached=4096):
+        self.format_field = format_field
+        self.max_cached = max_cached
+        self._fields = OrderedDict()
+
+    def clear(self):
+        self._fields.clear()
+
+    def field(self, event):
+        key = (event["uid"], event["begin"], event.get("all_day", False))
+        value = self._fields.get(key)
+        if value is None:
+            value = self.format_field(event)
+            if len(value) > FIELD_VALUE_MAX:
+                value = value[:FIELD_VALUE_MAX - 1] + "…"
+            self._fields[key] = value
+            if len(self._fields) > self.max_cached:
+                self._fields.popitem(last=False)
+        else:
+            self._fields.move_to_end(key)
+        return value
+
+    def render(self, events, title, color, description=None):
+        """Lay `events` out as a list of messages, each a list of at most 10 embeds.
+
+        Fields are added greedily: a new embed starts at 25 fields, and a new message
+        starts when another embed wouldn't fit or the 6,000-character budget is used up.
+        Only the first embed carries the title and description.
+        """
+        messages = []
+        embeds = []
+        chars = 0
+        embed = None
+
+        def start_embed(first):
+            nonlocal chars
+            if first:
+                new = discord.Embed(title=title, color=color, description=description)
+                chars += len(title or "") + len(description or "")
+            else:
+                new = discord.Embed(color=color)
+            embeds.append(new)
+            return new
+
+        for event in events:
+            value = self.field(event)
+            if embed is not None and chars + len(value) > MESSAGE_MAX_CHARS:
+                messages.append(embeds)
+                embeds, chars, embed = [], 0, None
+            if embed is None or len(embed.fields) >= EMBED_MAX_FIELDS:
+                if len(embeds) >= MESSAGE_MAX_EMBEDS:
+                    messages.append(embeds)
+                    embeds, chars = [], 0
+                embed = start_embed(not messages and not embeds)
+            embed.add_field(name="", value=value, inline=False)
+            chars += len(value)
+
+        if embeds:
+            messages.append(embeds)
+        return messages
@@ -0,0 +1,324 @@
+import csv
+import itertools
+import os
+import random
+import string
+import time
+from collections import deque
+from datetime import datetime
+from email.mime.text import MIMEText
+
+from utils.mailer import SMTPPool
+from utils.persistence import JSON_DIR, JsonFile
+
+POLL_STATE_FILE = os.path.join(JSON_DIR, "poll_state.json")
+CREDENTIALS_FILE = os.path.join(JSON_DIR, "nolebot-credentials.json")
+SHEET_NAME = "NoleBot Verification"
+SHEETS_SCOPE = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+TIMESTAMP_FORMAT = '%m/%d/%Y %H:%M:%S'
+FULL_RESCAN_EVERY = 60  # Polls between full re-reads, in case rows were deleted or reordered
+POLL_FLOOR = 10  # Fastest poll interval, in seconds, while submissions keep arriving
+POLL_CEILING = 300  # Slowest poll interval when the form is idle
+POLL_START = 60
+POLL_IDLE_GROWTH = 1.5  # Interval multiplier after a poll with no new rows
+POLL_QUOTA_CEILING = 900  # Longest wait after repeated Sheets quota errors
+POLL_HISTORY = 30  # Polls the hit rate is measured over
+
+OUTBOX_MAX_ATTEMPTS = 8  # After this many failures a row is marked dead and left for a human
+OUTBOX_BASE_DELAY = 30  # Seconds before the first retry; doubled per attempt
+OUTBOX_MAX_DELAY = 3600
+OUTBOX_IDLE_SLEEP = 60  # Longest the outbox waits without being woken by a poll
+
+
+# ======== Verification Code Utilities ========
+def generate_code(length=6):
+    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
+
+
+def build_verification_email(to_email, code, sender):
+    # MIMEText's compat32 headers skip EmailMessage's header parsing, which cost ~1ms
+    # per message and dominated outbox batches in utils/verification_bench.py
+    msg = MIMEText(
+        f"""
+Hi there,
+
+This is an automatic message from NoleBot, the official FSU Esports Discord verification system.
+
+Your verification code is: {code}
+
+To complete verification, please DM this code to the NoleBot Discord bot using the /verify command.
+
+If you did not request this code or submitted the form in error, you can safely ignore this email.
+
+Thank you,
+FSU NoleBot Team
+"""
+    )
+    msg['Subject'] = 'Your FSU Discord Verification Code from NoleBot'
+    msg['From'] = sender
+    msg['To'] = to_email
+    msg['Reply-To'] = sender
+    return msg
+
+
+def gmail_pool():
+    """SMTP pool for the Gmail account in GMAIL_ADDRESS / GMAIL_APP_PASSWORD."""
+    return SMTPPool('smtp.gmail.com', 465, os.getenv("GMAIL_ADDRESS"), os.getenv("GMAIL_APP_PASSWORD"))
+
+
+def column_letter(col):
+    """A1-style column name for 1-based `col` (1 -> A, 27 -> AA)."""
+    letters = ""
+    while col > 0:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+# ======== Submission Sources ========
+class SubmissionSource:
+    """Where form submissions come from.
+
+    Rows are numbered like a spreadsheet, so row 1 is the header and the first
+    submission is row 2. Implementations block on I/O; callers run them in a thread.
+    """
+
+    def rows_after(self, last_row, refresh=False):
+        """(row number, record dict) for every submission below `last_row`.
+
+        `refresh` asks the source to re-read anything it caches, such as the header.
+        """
+        raise NotImplementedError
+
+
+class GoogleSheetSource(SubmissionSource):
+    """The verification Google Form's response sheet.
+
+    The sheet is opened on first use rather than at import, so loading the module
+    never needs credentials, or gspread and oauth2client at all; CsvSource and the
+    load harness run without them.
+    """
+
+    def __init__(self, sheet_name=SHEET_NAME, credentials_file=CREDENTIALS_FILE):
+        self.sheet_name = sheet_name
+        self.credentials_file = credentials_file
+        self._sheet = None
+        self.header = None
+
+    @property
+    def sheet(self):
+        if self._sheet is None:
+            import gspread
+            from oauth2client.service_account import ServiceAccountCredentials
+
+            creds = ServiceAccountCredentials.from_json_keyfile_name(self.credentials_file, SHEETS_SCOPE)
+            self._sheet = gspread.authorize(creds).open(self.sheet_name).sheet1
+        return self._sheet
+
+    def rows_after(self, last_row, refresh=False):
+        """Probes the single cell after `last_row` first, so a poll with no new
+        submissions costs one one-cell read instead of downloading the whole sheet.
+        """
+        if refresh or self.header is None:
+            self.header = self.sheet.row_values(1)
+        start = last_row + 1
+        if not self.sheet.get(f"A{start}:A{start}"):
+            return []
+        values = self.sheet.get(f"A{start}:{column_letter(len(self.header))}")
+        return rows_with_header(self.header, values, start)
+
+
+class CsvSource(SubmissionSource):
+    """A CSV export (or hand-written file) with the same columns as the form sheet.
+
+    Lets the pipeline run offline, for development and the load harness.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def rows_after(self, last_row, refresh=False):
+        with open(self.path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return []
+            values = list(itertools.islice(reader, last_row - 1, None))
+        return rows_with_header(header, values, last_row + 1)
+
+
+def rows_with_header(header, values, start):
+    rows = []
+    for offset, values_row in enumerate(values):
+        values_row = values_row + [""] * (len(header) - len(values_row))
+        rows.append((start + offset, dict(zip(header, values_row))))
+    return rows
+
+
+# ======== Polling ========
+class FormPoller:
+    """Turns new form submissions into outbox entries.
+
+    Every method blocks on the network or disk; the bot runs them in an executor,
+    the standalone script calls them directly. `source` defaults to the Google Sheet.
+    """
+
+    def __init__(self, store, source=None, state_path=POLL_STATE_FILE):
+        self.store = store
+        self.source = source or GoogleSheetSource()
+        self.state = JsonFile(state_path)
+        self.polls = 0
+
+    def poll(self):
+        """Queue an email for every new submission; returns how many were queued."""
+        # Rows already covered by last_timestamp are skipped below, so a full
+        # re-read just resynchronises last_row
+        full_rescan = self.polls % FULL_RESCAN_EVERY == 0
+        # Row 1 is the header, so "nothing processed yet" is row 1
+        last_row = 1 if full_rescan else self.state.data.get("last_row", 1)
+        rows = self.source.rows_after(last_row, refresh=full_rescan)
+        self.polls += 1
+
+        last_timestamp_raw = self.state.data.get("last_timestamp")
+        last_timestamp = datetime.strptime(last_timestamp_raw, TIMESTAMP_FORMAT) if last_timestamp_raw else None
+        max_timestamp_seen = last_timestamp
+        queued = 0
+
+        for row_number, entry in rows:
+            timestamp_str = entry.get("Timestamp")
+            email = entry.get("FSU Student Email")
+            discord_tag = entry.get("Discord Tag")
+
+            if not timestamp_str or not email or not discord_tag:
+                continue
+
+            try:
+                timestamp_dt = datetime.strptime(timestamp_str, TIMESTAMP_FORMAT)
+            except ValueError:
+                print(f"⚠️ Skipping invalid timestamp format: {timestamp_str}")
+                continue
+
+            if last_timestamp and timestamp_dt <= last_timestamp:
+                continue
+
+            # Durable once queued, so the watermarks can move past it even if sending fails
+            if self.store.enqueue_email(email, timestamp_str, discord_tag, generate_code()):
+                queued += 1
+            if not max_timestamp_seen or timestamp_dt > max_timestamp_seen:
+                max_timestamp_seen = timestamp_dt
+
+        if queued:
+            print(f"📬 Queued {queued} verification email(s)")
+        changed = False
+        if max_timestamp_seen and max_timestamp_seen != last_timestamp:
+            self.state.data["last_timestamp"] = max_timestamp_seen.strftime(TIMESTAMP_FORMAT)
+            changed = True
+        if rows and rows[-1][0] != self.state.data.get("last_row"):
+            self.state.data["last_row"] = rows[-1][0]
+            changed = True
+        if changed:
+            # Called from a worker thread, outside the event loop, so this writes immediately
+            self.state.mark_dirty()
+        return queued
+
+
+def is_quota_error(error):
+    """True for a Sheets API 429 (gspread.exceptions.APIError carries the response)."""
+    return getattr(getattr(error, "response", None), "status_code", None) == 429
+
+
+class PollSchedule:
+    """Adaptive delay between form polls.
+
+    Each poll that finds new rows halves the interval toward POLL_FLOOR, so a burst
+    of signups is picked up within seconds; each empty poll grows it by
+    POLL_IDLE_GROWTH toward POLL_CEILING. A Sheets quota error doubles the interval
+    (past the ceiling if need be, up to POLL_QUOTA_CEILING). Delays get ±10% jitter
+    so restarts and retries don't line up.
+    """
+
+    def __init__(self, floor=POLL_FLOOR, ceiling=POLL_CEILING, start=POLL_START, history=POLL_HISTORY):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.interval = start
+        self.history = deque(maxlen=history)
+        self.quota_errors = 0
+
+    def record(self, queued):
+        self.history.append(queued > 0)
+        if queued:
+            self.interval = max(self.floor, self.interval / 2)
+        else:
+            self.interval = min(self.ceiling, self.interval * POLL_IDLE_GROWTH)
+
+    def record_error(self, error):
+        if is_quota_error(error):
+            self.quota_errors += 1
+            self.interval = min(POLL_QUOTA_CEILING, max(self.interval, self.floor) * 2)
+
+    @property
+    def hit_rate(self):
+        """Share of recent polls that found at least one new submission."""
+        return sum(self.history) / len(self.history) if self.history else 0.0
+
+    def next_delay(self):
+        return self.interval * random.uniform(0.9, 1.1)
+
+    def stats(self):
+        return {
+            "interval": round(self.interval, 1),
+            "hit_rate": round(self.hit_rate, 3),
+            "polls": len(self.history),
+            "quota_errors": self.quota_errors,
+        }
+
+
+# ======== Email Outbox ========
+def retry_delay(attempts):
+    delay = min(OUTBOX_MAX_DELAY, OUTBOX_BASE_DELAY * 2 ** attempts)
+    return delay * random.uniform(0.5, 1.5)
+
+
+class EmailOutbox:
+    """Sends due outbox rows, retrying failures with backoff.
+
+    A code only becomes usable once its email has actually gone out. Rows that keep
+    failing are marked dead rather than dropped, so they can be inspected or
+    requeued by hand. Blocking, like FormPoller.
+    """
+
+    def __init__(self, store, mailer, sender=None):
+        self.store = store
+        self.mailer = mailer
+        self.sender = sender or os.getenv("GMAIL_ADDRESS")
+
+    def deliver_due(self):
+        """Send one batch of due rows; returns the emails whose codes are now live."""
+        due = self.store.due_emails()
+        if not due:
+            return []
+        delivered = []
+        errors = self.mailer.send_many([build_verification_email(row["email"], row["code"], self.sender) for row in due])
+        for row, error in zip(due, errors):
+            email, discord_tag = row["email"], row["discord_tag"]
+            if error is None:
+                if self.store.email_sent(row["id"]):
+                    delivered.append(email)
+                    print(f"✅ Sent code to {email} ({discord_tag})")
+                continue
+            attempts = row["attempts"] + 1
+            if attempts >= OUTBOX_MAX_ATTEMPTS:
+                self.store.email_failed(row["id"], str(error), next_at=0, dead=True)
+                print(f"💀 Giving up on email for {email} ({discord_tag}) after {attempts} attempts: {error}")
+            else:
+                delay = retry_delay(row["attempts"])
+                self.store.email_failed(row["id"], str(error), next_at=time.time() + delay)
+                print(f"❌ Failed to send email for {email} ({discord_tag}), retrying in {delay:.0f}s: {error}")
+        return delivered
+
+    def idle_timeout(self):
+        """Seconds until the next pending row is due, capped at OUTBOX_IDLE_SLEEP."""
+        next_due = self.store.next_email_due()
+        if next_due is None:
+            return OUTBOX_IDLE_SLEEP
+        return min(OUTBOX_IDLE_SLEEP, max(0, next_due - time.time()))
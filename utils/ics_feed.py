@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import json
+import time
+
+import aiohttp
+from icalendar import Calendar
+
+from utils.persistence import DebouncedWriter, write_atomic
+
+
+class FeedCache:
+    """Conditional-GET cache for a single ICS feed.
+
+    Keeps the raw body, its ETag/Last-Modified validators and the parsed result.
+    Within `ttl` seconds of the last fetch the cached result is returned without
+    touching the network; after that the feed is revalidated and a 304 reuses the
+    already-parsed result. The body and validators are saved to `cache_path` so a
+    restart starts warm.
+
+    `parse` is an optional coroutine function taking the raw body; it only runs when
+    the body's digest changes. Without it the body is parsed into an icalendar
+    Calendar inline.
+    """
+
+    def __init__(self, url, cache_path, ttl=300, parse=None):
+        self.url = url
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.parse = parse
+        self.body = None
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = 0.0
+        self.retry_at = 0.0
+        self.digest = None
+        self.parsed = None
+        self._lock = asyncio.Lock()
+        self._writer = DebouncedWriter(self._snapshot, self._write, name=f"feed cache {cache_path}")
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"⚠️ Ignoring unreadable feed cache {self.cache_path}: {e}")
+            return
+        if data.get("url") != self.url or not data.get("body"):
+            return
+        self.body = data["body"]
+        self.etag = data.get("etag")
+        self.last_modified = data.get("last_modified")
+        self.fetched_at = data.get("fetched_at", 0.0)
+        self.digest = hashlib.sha256(self.body.encode("utf-8")).hexdigest()
+
+    def _snapshot(self):
+        return {
+            "url": self.url,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "fetched_at": self.fetched_at,
+            "body": self.body,
+        }
+
+    def _write(self, snapshot):
+        # The body can be megabytes, so serialize in the writer thread too
+        write_atomic(self.cache_path, json.dumps(snapshot))
+
+    def _save(self):
+        self._writer.mark_dirty()
+
+    async def flush(self):
+        """Write any pending cache update now; call on shutdown."""
+        await self._writer.flush()
+
+    def is_fresh(self):
+        return self.body is not None and time.time() - self.fetched_at < self.ttl
+
+    async def get(self, session=None):
+        """Return the parsed feed, hitting the network only when the cache is stale.
+
+        Concurrent callers share one request: the first one revalidates, the rest wait
+        on the lock and then see a fresh cache.
+        """
+        async with self._lock:
+            await self._refresh(session)
+            if self.parsed is None and self.body is not None:
+                self.parsed = await self._parse(self.body)
+            return self.parsed
+
+    async def refresh(self, session=None):
+        """Revalidate if stale and return the raw body, without parsing it."""
+        async with self._lock:
+            await self._refresh(session)
+            return self.body
+
+    async def _refresh(self, session):
+        if self.is_fresh():
+            return
+        try:
+            await self._revalidate(session)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if self.body is None:
+                raise
+            print(f"⚠️ Calendar fetch failed, serving cached copy: {e}")
+
+    def defer(self):
+        """Keep serving the cached copy for another `ttl` after a failed or abandoned refresh.
+
+        With nothing cached yet the feed is backed off for `ttl` instead, so a source
+        that has never loaded doesn't hold up every caller until it times out.
+        """
+        if self.body is not None:
+            self.fetched_at = time.time()
+        else:
+            self.retry_at = time.time() + self.ttl
+
+    def is_backing_off(self):
+        return self.body is None and time.time() < self.retry_at
+
+    async def reparse(self):
+        """Parse the cached body again without revalidating it."""
+        async with self._lock:
+            self.parsed = await self._parse(self.body)
+            return self.parsed
+
+    async def _parse(self, body):
+        if self.parse is None:
+            return Calendar.from_ical(body)
+        return await self.parse(body)
+
+    async def _revalidate(self, session):
+        headers = {}
+        if self.body is not None:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+
+        if session is None:
+            async with aiohttp.ClientSession() as own_session:
+                status, body, resp_headers = await self._request(own_session, headers)
+        else:
+            status, body, resp_headers = await self._request(session, headers)
+
+        self.fetched_at = time.time()
+        if status == 304 and self.body is not None:
+            # Only fetched_at changed; rewriting a multi-megabyte cache for that isn't
+            # worth it, and a restart just revalidates once more
+            return
+
+        digest = hashlib.sha256(body.encode("utf-8")).hexdigest()
+        self.etag = resp_headers.get("ETag")
+        self.last_modified = resp_headers.get("Last-Modified")
+        if digest != self.digest:
+            self.body = body
+            self.digest = digest
+            self.parsed = None
+        self._save()
+
+    async def _request(self, session, headers):
+        async with session.get(self.url, headers=headers) as resp:
+            if resp.status == 304:
+                return resp.status, None, resp.headers
+            resp.raise_for_status()
+            return resp.status, await resp.text(), resp.headers
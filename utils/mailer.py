@@ -0,0 +1,143 @@
+import queue
+import random
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SMTP_POOL_SIZE = 4  # Authenticated connections kept open at once
+SMTP_TIMEOUT = 30
+SMTP_IDLE_TIMEOUT = 240  # Gmail drops idle sessions after a few minutes; reconnect before that
+
+
+class SMTPPool:
+    """A small pool of logged-in SMTP connections shared by every send.
+
+    Connections are opened lazily, reused across messages, and replaced when the
+    server has hung up (SMTPServerDisconnected) or they've sat idle long enough that
+    it probably has. `send_many` sends a batch in parallel, one thread per pooled
+    connection, so a burst of codes costs one TLS handshake and AUTH per connection
+    instead of per email.
+
+    `use_ssl=False` with no credentials talks plain SMTP, e.g. to a local aiosmtpd.
+    """
+
+    def __init__(self, host, port, username=None, password=None, size=SMTP_POOL_SIZE,
+                 use_ssl=True, timeout=SMTP_TIMEOUT, idle_timeout=SMTP_IDLE_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._idle = queue.LifoQueue()  # (connection, last used), most recently used first
+        self._slots = threading.BoundedSemaphore(size)
+        self._executor = None
+
+    def _connect(self):
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        smtp = smtp_class(self.host, self.port, timeout=self.timeout)
+        if self.username:
+            smtp.login(self.username, self.password)
+        return smtp
+
+    @staticmethod
+    def _quit(smtp):
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+    def _checkout(self):
+        while True:
+            try:
+                smtp, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - last_used < self.idle_timeout:
+                return smtp
+            self._quit(smtp)
+
+    def send(self, msg):
+        """Send one EmailMessage, reconnecting once if the pooled connection went away."""
+        with self._slots:
+            smtp = self._checkout()
+            try:
+                try:
+                    smtp.send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    smtp.close()
+                    smtp = self._connect()
+                    smtp.send_message(msg)
+            except BaseException:
+                # Don't hand a connection in an unknown state to the next sender
+                self._quit(smtp)
+                raise
+            self._idle.put((smtp, time.monotonic()))
+
+    def send_many(self, messages):
+        """Send `messages` in parallel; returns one exception (or None) per message, in order."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="smtp")
+
+        def attempt(msg):
+            try:
+                self.send(msg)
+            except Exception as e:
+                return e
+            return None
+
+        return list(self._executor.map(attempt, messages))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        while True:
+            try:
+                smtp, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._quit(smtp)
+
+
+class RecordingMailer:
+    """Stands in for SMTPPool by keeping messages instead of sending them.
+
+    `latency` simulates the per-message send time of a pool with `size` connections,
+    and `failure_rate` makes that share of sends raise SMTPServerDisconnected, so
+    retries can be exercised offline.
+    """
+
+    def __init__(self, latency=0.0, failure_rate=0.0, size=SMTP_POOL_SIZE, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.size = size
+        self.sent = []  # (time.time() when sent, EmailMessage)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _attempt(self, msg):
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            return smtplib.SMTPServerDisconnected("simulated failure")
+        with self._lock:
+            self.sent.append((time.time(), msg))
+        return None
+
+    def send(self, msg):
+        if self.latency:
+            time.sleep(self.latency)
+        error = self._attempt(msg)
+        if error is not None:
+            raise error
+
+    def send_many(self, messages):
+        if self.latency and messages:
+            # Messages go out `size` at a time, as over the real pool
+            time.sleep(self.latency * -(-len(messages) // self.size))
+        return [self._attempt(msg) for msg in messages]
+
+    def close(self):
+        pass
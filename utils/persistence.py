@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+
+JSON_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "json"))
+DEBOUNCE_SECONDS = 1.0  # Window over which repeated mark_dirty() calls share one write
+
+
+def write_atomic(path, text):
+    """Replace `path` with `text` so readers only ever see the old or the new file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class DebouncedWriter:
+    """Coalesces bursts of changes into one write, run in a worker thread.
+
+    `snapshot()` runs on the event loop when the write starts and must return a copy
+    of whatever needs saving (cheap: immutable values, or already-serialized text);
+    `write(snapshot)` then runs off-loop. Changes made while a write is in progress
+    mark the writer dirty again and are picked up by the next one.
+
+    Outside a running event loop (the poller script, or cog setup) `mark_dirty()`
+    writes synchronously instead.
+    """
+
+    def __init__(self, snapshot, write, debounce=DEBOUNCE_SECONDS, name="state"):
+        self.snapshot = snapshot
+        self.write = write
+        self.debounce = debounce
+        self.name = name
+        self._dirty = False
+        self._task = None
+        self._lock = None
+
+    def mark_dirty(self):
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush_sync()
+            return
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.debounce)
+        await self.flush()
+
+    async def flush(self):
+        """Write now if anything changed. Safe to call from cog_unload."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            data = self.snapshot()
+            try:
+                await asyncio.to_thread(self.write, data)
+            except OSError as e:
+                self._dirty = True
+                print(f"⚠️ Could not save {self.name}: {e}")
+
+    def flush_sync(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        try:
+            self.write(self.snapshot())
+        except OSError as e:
+            self._dirty = True
+            print(f"⚠️ Could not save {self.name}: {e}")
+
+
+class JsonFile:
+    """A JSON document held in `data`, saved atomically after `mark_dirty()`.
+
+    Mutate `data` in place (or reassign it), then call `mark_dirty()`; `await flush()`
+    on shutdown so the last debounce window isn't lost.
+    """
+
+    def __init__(self, path, default=None, indent=2, debounce=DEBOUNCE_SECONDS):
+        self.path = path
+        self.indent = indent
+        self.data = self._load(default)
+        self._writer = DebouncedWriter(
+            lambda: json.dumps(self.data, indent=self.indent),
+            lambda text: write_atomic(self.path, text),
+            debounce=debounce,
+            name=os.path.basename(path),
+        )
+
+    def _load(self, default):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError as e:
+            print(f"⚠️ Ignoring unreadable {self.path}: {e}")
+        return {} if default is None else default
+
+    def mark_dirty(self):
+        self._writer.mark_dirty()
+
+    async def flush(self):
+        await self._writer.flush()
+
+    def flush_sync(self):
+        self._writer.flush_sync()
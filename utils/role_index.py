@@ -0,0 +1,59 @@
+import bisect
+import difflib
+
+MAX_SUGGESTIONS = 3
+
+
+def normalize_role_name(name):
+    """Case- and whitespace-insensitive form used for every lookup."""
+    return " ".join(name.casefold().split())
+
+
+class RoleIndex:
+    """Normalized name (and alias) -> role, for one guild's assignable roles only.
+
+    Exact names resolve with a dict lookup; anything else falls back to a unique
+    prefix match found by bisecting the sorted names. Build a new index whenever the
+    guild's roles change rather than mutating this one.
+    """
+
+    def __init__(self, roles, assignable_ids, aliases=None):
+        self.by_name = {}
+        by_id = {role.id: role for role in roles if role.id in assignable_ids}
+        for role in by_id.values():
+            self.by_name[normalize_role_name(role.name)] = role
+        for alias, role_id in (aliases or {}).items():
+            role = by_id.get(int(role_id))
+            if role is not None:
+                self.by_name.setdefault(normalize_role_name(alias), role)
+        self.names = sorted(self.by_name)
+
+    def __len__(self):
+        return len(self.by_name)
+
+    def prefix_matches(self, key):
+        start = bisect.bisect_left(self.names, key)
+        matches = []
+        for name in self.names[start:]:
+            if not name.startswith(key):
+                break
+            matches.append(name)
+        return matches
+
+    def lookup(self, name):
+        """(role, suggestions): the role `name` refers to, or None and some close names."""
+        key = normalize_role_name(name)
+        if not key:
+            return None, []
+        role = self.by_name.get(key)
+        if role is not None:
+            return role, []
+        matches = self.prefix_matches(key)
+        # Several names (or aliases) with this prefix may still point at one role
+        if matches and len({self.by_name[match].id for match in matches}) == 1:
+            return self.by_name[matches[0]], []
+        if not matches:
+            matches = difflib.get_close_matches(key, self.names, n=MAX_SUGGESTIONS * 2, cutoff=0.6)
+        # An alias and its role's own name can both match; suggest each role once
+        suggestions = dict.fromkeys(self.by_name[match].name for match in matches)
+        return None, list(suggestions)[:MAX_SUGGESTIONS]
@@ -0,0 +1,216 @@
+import asyncio
+import heapq
+import itertools
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytz
+
+from utils.persistence import JSON_DIR, DebouncedWriter, write_atomic
+
+SCHEDULER_STATE_FILE = os.path.join(JSON_DIR, "scheduler_state.json")
+MAX_SLEEP = 3600  # Re-check the heap at least hourly in case the wall clock jumped
+CATCH_UP_WINDOW = timedelta(hours=6)  # Missed fires older than this are skipped, not replayed
+
+
+class CronSpec:
+    """A five-field cron expression: minute hour day-of-month month day-of-week.
+
+    Fields accept `*`, single values, `a-b` ranges, `a,b,c` lists and `/n` steps.
+    Day-of-week follows cron, so 0 and 7 are Sunday and 1 is Monday.
+    """
+
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron spec needs 5 fields, got {expression!r}")
+        self.expression = expression
+        fields = [self._parse_field(part, lo, hi) for part, (lo, hi) in zip(parts, self.FIELD_RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = fields
+        # Convert cron weekdays (0/7 = Sunday) to datetime.weekday() (0 = Monday)
+        self.weekdays = {(d - 1) % 7 for d in weekdays}
+        self.any_day = parts[2] == "*"
+        self.any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def _parse_field(part, lo, hi):
+        values = set()
+        for item in part.split(","):
+            step = 1
+            if "/" in item:
+                item, step = item.split("/", 1)
+                step = int(step)
+            if item == "*":
+                start, end = lo, hi
+            elif "-" in item:
+                start, end = (int(x) for x in item.split("-", 1))
+            else:
+                start = end = int(item)
+            if start < lo or end > hi or start > end or step < 1:
+                raise ValueError(f"Cron field {part!r} out of range {lo}-{hi}")
+            values.update(range(start, end + 1, step))
+        return sorted(values)
+
+    def _day_matches(self, day):
+        if day.month not in self.months:
+            return False
+        dom = day.day in self.days
+        dow = day.weekday() in self.weekdays
+        # Standard cron: when both are restricted, either one matching is enough
+        if not self.any_day and not self.any_weekday:
+            return dom or dow
+        return dom and dow
+
+    def next_after(self, after, tz):
+        """First fire time strictly after `after`, as an aware datetime in `tz`.
+
+        Wall-clock times skipped by a DST jump fire at the equivalent instant after the
+        jump; times repeated when clocks fall back fire once, on the first pass.
+        """
+        local_after = after.astimezone(tz)
+        day = local_after.date()
+        for _ in range(366 * 5):
+            if self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        naive = datetime(day.year, day.month, day.day, hour, minute)
+                        try:
+                            candidate = tz.localize(naive, is_dst=None)
+                        except pytz.NonExistentTimeError:
+                            candidate = tz.normalize(tz.localize(naive, is_dst=False))
+                        except pytz.AmbiguousTimeError:
+                            candidate = tz.localize(naive, is_dst=True)
+                        if candidate > after:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError(f"Cron spec {self.expression!r} never fires")
+
+
+class Job:
+    def __init__(self, name, spec, callback):
+        self.name = name
+        self.spec = spec
+        self.callback = callback
+        self.next_fire = None
+
+
+class Scheduler:
+    """Sleeps until the earliest registered deadline instead of polling every minute.
+
+    Jobs are kept in a heap ordered by their next fire time. The last fire of every job
+    is saved to `state_path`; when a job is registered after a restart and its most
+    recent deadline was missed by less than CATCH_UP_WINDOW, it fires immediately.
+    Callbacks are coroutine functions that receive the scheduled fire time.
+    """
+
+    def __init__(self, tz, state_path=SCHEDULER_STATE_FILE):
+        self.tz = tz
+        self.state_path = state_path
+        self.jobs = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._running = set()
+        self._last_runs = self._load_state()
+        self._writer = DebouncedWriter(self._snapshot_state, self._write_state, name="scheduler state")
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r") as f:
+                return {name: datetime.fromisoformat(ts) for name, ts in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable scheduler state: {e}")
+            return {}
+
+    def _snapshot_state(self):
+        return {name: ts.isoformat() for name, ts in self._last_runs.items()}
+
+    def _write_state(self, snapshot):
+        write_atomic(self.state_path, json.dumps(snapshot, indent=2))
+
+    def _save_state(self):
+        self._writer.mark_dirty()
+
+    async def flush(self):
+        """Write pending last-run times now; call on shutdown."""
+        await self._writer.flush()
+
+    def add_job(self, name, spec, callback):
+        """Register `callback` to run on the cron `spec`, replacing any job with the same name."""
+        job = Job(name, CronSpec(spec), callback)
+        now = datetime.now(self.tz)
+        last_run = self._last_runs.get(name)
+        if last_run is not None:
+            # Find the most recent deadline that passed while we weren't running
+            missed = None
+            candidate = job.spec.next_after(last_run, self.tz)
+            while candidate <= now:
+                missed = candidate
+                candidate = job.spec.next_after(candidate, self.tz)
+            if missed is not None and now - missed <= CATCH_UP_WINDOW:
+                print(f"⏰ Catching up missed run of {name} scheduled for {missed}")
+                job.next_fire = missed
+        if job.next_fire is None:
+            job.next_fire = job.spec.next_after(now, self.tz)
+        self.jobs[name] = job
+        heapq.heappush(self._heap, (job.next_fire.timestamp(), next(self._counter), job))
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return job
+
+    def remove_job(self, name):
+        # Heap entries for removed jobs are skipped lazily when they come due
+        self.jobs.pop(name, None)
+        if not self.jobs and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            while self._heap and self.jobs.get(self._heap[0][2].name) is not self._heap[0][2]:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            fire_ts, _, job = self._heap[0]
+            delay = fire_ts - datetime.now(pytz.utc).timestamp()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min(delay, MAX_SLEEP))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            fire_time = job.next_fire
+            task = asyncio.create_task(self._fire(job, fire_time))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            job.next_fire = job.spec.next_after(max(fire_time, datetime.now(self.tz)), self.tz)
+            heapq.heappush(self._heap, (job.next_fire.timestamp(), next(self._counter), job))
+            self._last_runs[job.name] = fire_time
+            self._save_state()
+
+    async def _fire(self, job, fire_time):
+        try:
+            await job.callback(fire_time)
+        except Exception as e:
+            print(f"❌ Scheduled job {job.name} failed: {e}")
+
+
+def get_scheduler(bot):
+    """Return the bot-wide scheduler, creating it on first use so every cog shares one heap."""
+    scheduler = getattr(bot, "scheduler", None)
+    if scheduler is None:
+        scheduler = Scheduler(pytz.timezone("US/Eastern"))
+        bot.scheduler = scheduler
+    return scheduler
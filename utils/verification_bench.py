@@ -0,0 +1,169 @@
+"""Load test for the student verification pipeline.
+
+Run it from the repo root with
+
+    python -m utils.verification_bench --submissions 10000 --output bench.json
+
+It writes synthetic form submissions to a CSV file and pushes them end-to-end through
+the same pieces the bot uses: FormPoller (code generation and the outbox), EmailOutbox
+with a RecordingMailer instead of Gmail, and the DMDispatcher with a simulated
+`member.send`. Everything lives in a temporary directory, so it never touches
+json/verification.db. Throughput and per-stage latency are printed (and optionally
+written) as JSON so runs can be diffed over time.
+"""
+import argparse
+import asyncio
+import contextlib
+import csv
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from utils import form_submissions
+from utils.dm_dispatcher import DMDispatcher
+from utils.form_submissions import CsvSource, EmailOutbox, FormPoller
+from utils.mailer import RecordingMailer
+from utils.verification_store import VerificationStore
+
+BENCH_FORMAT_VERSION = 1
+
+
+def generate_submissions(path, count, start=None):
+    """CSV in the form sheet's layout with `count` distinct students, one second apart."""
+    start = start or datetime(2025, 8, 25, 9, 0, 0)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Timestamp", "FSU Student Email", "Discord Tag"])
+        for i in range(count):
+            timestamp = (start + timedelta(seconds=i)).strftime(form_submissions.TIMESTAMP_FORMAT)
+            writer.writerow([timestamp, f"student{i}@fsu.edu", f"student_{i}"])
+
+
+def summarize_latencies(latencies):
+    latencies = sorted(latencies)
+    if not latencies:
+        return {}
+    return {
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1 if len(latencies) > 1 else 0] * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+
+def stage(name, started, finished_at, previous=None):
+    """Report for one stage, given per-email completion times (and the previous stage's)."""
+    if not finished_at:
+        return {"stage": name, "count": 0}
+    duration = max(finished_at.values()) - started
+    latencies = [
+        finished - (previous[email] if previous is not None else started)
+        for email, finished in finished_at.items()
+    ]
+    return {
+        "stage": name,
+        "count": len(finished_at),
+        "duration_s": round(duration, 3),
+        "throughput_per_s": round(len(finished_at) / duration, 2) if duration else None,
+        "latency": summarize_latencies(latencies),
+    }
+
+
+async def run_pipeline(args, workdir):
+    csv_path = os.path.join(workdir, "submissions.csv")
+    generate_submissions(csv_path, args.submissions)
+    store = VerificationStore(os.path.join(workdir, "verification.db"))
+    poller = FormPoller(store, source=CsvSource(csv_path), state_path=os.path.join(workdir, "poll_state.json"))
+    mailer = RecordingMailer(latency=args.mail_latency, failure_rate=args.mail_failure_rate, seed=0)
+    outbox = EmailOutbox(store, mailer, sender="nolebot-bench@example.com")
+
+    dm_sent_at = {}
+
+    async def fake_dm(email, entry):
+        await asyncio.sleep(args.dm_latency)
+        dm_sent_at[email] = time.time()
+
+    dispatcher = DMDispatcher(store, fake_dm, concurrency=args.dm_concurrency)
+    dispatcher.start()
+    try:
+        started = time.time()
+        queued = await asyncio.to_thread(poller.poll)
+        polled = time.time()
+        enqueued_at = {
+            row["email"]: row["updated_at"]
+            for row in store.conn.execute("SELECT email, updated_at FROM outbox")
+        }
+
+        # Mirrors FormPollerCog.deliver_outbox: each delivered batch goes straight to the DM queue
+        delivered = 0
+        while store.next_email_due() is not None:
+            emails = await asyncio.to_thread(outbox.deliver_due)
+            for email in emails:
+                dispatcher.submit(email)
+            delivered += len(emails)
+            if not emails:
+                await asyncio.sleep(outbox.idle_timeout())
+        live_at = {email: entry["timestamp"] for email, entry in store.all().items()}
+
+        while len(dm_sent_at) < delivered:
+            await asyncio.sleep(0.01)
+        finished = time.time()
+    finally:
+        await dispatcher.close()
+        store.close()
+
+    return {
+        "submissions": args.submissions,
+        "queued": queued,
+        "emails_recorded": len(mailer.sent),
+        "dms_sent": len(dm_sent_at),
+        "total_s": round(finished - started, 3),
+        "end_to_end_throughput_per_s": round(len(dm_sent_at) / (finished - started), 2),
+        "end_to_end_latency": summarize_latencies([sent - started for sent in dm_sent_at.values()]),
+        "stages": [
+            stage("poll_and_enqueue", started, enqueued_at),
+            stage("email_and_store", polled, live_at, enqueued_at),
+            stage("dm_dispatch", polled, dm_sent_at, live_at),
+        ],
+    }
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the verification pipeline with synthetic submissions.")
+    parser.add_argument("--submissions", type=int, default=10000, help="Synthetic form submissions to push through")
+    parser.add_argument("--mail-latency", type=float, default=0.0, help="Simulated seconds per email")
+    parser.add_argument("--mail-failure-rate", type=float, default=0.0, help="Share of emails that fail and are retried")
+    parser.add_argument("--retry-delay", type=float, default=0.05, help="Base outbox retry delay, in place of 30s")
+    parser.add_argument("--dm-latency", type=float, default=0.01, help="Simulated seconds per member.send")
+    parser.add_argument("--dm-concurrency", type=int, default=8, help="DMs allowed in flight at once")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    form_submissions.OUTBOX_BASE_DELAY = args.retry_delay
+    report = {
+        "format_version": BENCH_FORMAT_VERSION,
+        "timestamp": datetime.now(pytz.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {k: v for k, v in vars(args).items() if k != "output"},
+    }
+    # The pipeline reports progress with print(); keep stdout for the JSON report
+    with tempfile.TemporaryDirectory(prefix="verification_bench_") as workdir, contextlib.redirect_stdout(sys.stderr):
+        print(f"⏱️ Pushing {args.submissions} submissions through the pipeline...", file=sys.stderr)
+        report["results"] = await run_pipeline(args, workdir)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+import asyncio
+import json
+import os
+import socket
+
+from utils.persistence import JSON_DIR
+
+SOCKET_PATH = os.getenv("VERIFICATION_SOCKET", os.path.join(JSON_DIR, "verification.sock"))
+NOTIFY_TIMEOUT = 1  # Seconds the poller waits on the bot before giving up
+
+
+def notify_new_submission(email, socket_path=SOCKET_PATH):
+    """Poller side: tell the bot a new code was stored for `email`.
+
+    Best effort only. If the bot isn't listening, its reconciliation sweep picks the
+    entry up from the database instead.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(NOTIFY_TIMEOUT)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps({"email": email}).encode("utf-8") + b"\n")
+    except OSError as e:
+        print(f"⚠️ Could not notify bot about {email} (sweep will catch it): {e}")
+
+
+async def serve_notifications(callback, socket_path=SOCKET_PATH):
+    """Bot side: listen on a Unix socket and await `callback(email)` per notification.
+
+    Returns the asyncio server; close it on shutdown.
+    """
+    async def handle(reader, writer):
+        try:
+            while line := await reader.readline():
+                try:
+                    email = json.loads(line)["email"]
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"⚠️ Ignoring malformed verification notification: {e}")
+                    continue
+                await callback(email)
+        finally:
+            writer.close()
+
+    # A socket file left behind by a crash would make bind() fail
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = await asyncio.start_unix_server(handle, path=socket_path)
+    os.chmod(socket_path, 0o600)
+    return server
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+LOG_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "logs"))
+LOG_RETENTION = timedelta(days=3)
+FLUSH_INTERVAL = 2  # Seconds between background flushes
+BUCKET_PREFIX = "verification-"
+
+
+class VerificationLog:
+    """Append-only log of /verify attempts, bucketed into one file per UTC day.
+
+    `record()` only formats the line and adds it to an in-memory buffer; a background
+    task appends the buffer to the current day's file every FLUSH_INTERVAL seconds
+    and deletes whole buckets once they fall out of LOG_RETENTION. Nothing on the
+    request path reads or rewrites old log lines.
+    """
+
+    def __init__(self, log_dir=LOG_DIR, retention=LOG_RETENTION, flush_interval=FLUSH_INTERVAL):
+        self.log_dir = log_dir
+        self.retention = retention
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._task = None
+        self._last_pruned = None
+        os.makedirs(log_dir, exist_ok=True)
+
+    def record(self, user, code, result):
+        now = datetime.now(timezone.utc)
+        timestamp_str = now.strftime('%Y-%m-%d %H:%M:%S')
+        line = f"[{timestamp_str} UTC] {user.name} ({user.id}) tried code '{code}': {result}\n"
+        with self._buffer_lock:
+            self._buffer.append((now.date(), line))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            # Idle: nothing to append and today's prune already done, so skip the thread hop
+            if not self._buffer and self._last_pruned == datetime.now(timezone.utc).date():
+                continue
+            try:
+                await asyncio.to_thread(self.flush)
+            except OSError as e:
+                print(f"⚠️ Could not write verification log: {e}")
+
+    def bucket_path(self, day):
+        return os.path.join(self.log_dir, f"{BUCKET_PREFIX}{day.isoformat()}.log")
+
+    def flush(self):
+        with self._buffer_lock:
+            pending, self._buffer = self._buffer, []
+        by_day = {}
+        for day, line in pending:
+            by_day.setdefault(day, []).append(line)
+        for day, lines in by_day.items():
+            with open(self.bucket_path(day), "a", encoding="utf-8") as f:
+                f.writelines(lines)
+
+        today = datetime.now(timezone.utc).date()
+        if self._last_pruned != today:
+            self.prune(today)
+            self._last_pruned = today
+
+    def prune(self, today):
+        """Delete day buckets entirely older than the retention window."""
+        cutoff = today - self.retention
+        for name in os.listdir(self.log_dir):
+            if not (name.startswith(BUCKET_PREFIX) and name.endswith(".log")):
+                continue
+            try:
+                day = datetime.strptime(name[len(BUCKET_PREFIX):-len(".log")], "%Y-%m-%d").date()
+            except ValueError:
+                continue
+            if day < cutoff:
+                os.remove(os.path.join(self.log_dir, name))
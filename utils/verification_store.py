@@ -0,0 +1,482 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.persistence import JSON_DIR
+
+VERIFICATION_DB = os.path.join(JSON_DIR, "verification.db")
+LEGACY_VERIFIED_FILE = os.path.join(JSON_DIR, "verified.json")
+LEGACY_BACKUP_FILE = os.path.join(JSON_DIR, "verified_backup.json")
+CODE_LIFETIME = 72 * 3600  # Seconds a verification code stays valid
+OUTBOX_KEEP = 30 * 24 * 3600  # Seconds sent/dead outbox rows are kept for idempotency and inspection
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS codes (
+    email        TEXT PRIMARY KEY,
+    code         TEXT NOT NULL,
+    code_lower   TEXT NOT NULL,
+    discord_tag  TEXT NOT NULL DEFAULT '',
+    tag_lower    TEXT NOT NULL DEFAULT '',
+    timestamp    REAL NOT NULL,
+    expires_at   REAL NOT NULL,
+    dm_sent      INTEGER NOT NULL DEFAULT 0,
+    dm_attempted INTEGER NOT NULL DEFAULT 0,
+    dm_attempts  INTEGER NOT NULL DEFAULT 0,
+    dm_next_at   REAL NOT NULL DEFAULT 0,
+    dm_error     TEXT
+);
+CREATE INDEX IF NOT EXISTS codes_by_code ON codes (code_lower);
+CREATE INDEX IF NOT EXISTS codes_by_tag ON codes (tag_lower);
+CREATE INDEX IF NOT EXISTS codes_by_expiry ON codes (expires_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+-- Every write to codes leaves the affected email here so in-memory indexes can catch up
+CREATE TABLE IF NOT EXISTS changes (
+    seq   INTEGER PRIMARY KEY AUTOINCREMENT,
+    email TEXT NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS codes_log_insert AFTER INSERT ON codes
+BEGIN INSERT INTO changes (email) VALUES (NEW.email); END;
+CREATE TRIGGER IF NOT EXISTS codes_log_update AFTER UPDATE ON codes
+BEGIN INSERT INTO changes (email) VALUES (NEW.email); END;
+CREATE TRIGGER IF NOT EXISTS codes_log_delete AFTER DELETE ON codes
+BEGIN INSERT INTO changes (email) VALUES (OLD.email); END;
+-- Verification emails waiting to be sent; one row per form submission
+CREATE TABLE IF NOT EXISTS outbox (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    email          TEXT NOT NULL,
+    form_timestamp TEXT NOT NULL,
+    discord_tag    TEXT NOT NULL,
+    code           TEXT NOT NULL,
+    status         TEXT NOT NULL DEFAULT 'pending',  -- pending, sent or dead
+    attempts       INTEGER NOT NULL DEFAULT 0,
+    next_at        REAL NOT NULL DEFAULT 0,
+    last_error     TEXT,
+    updated_at     REAL NOT NULL,
+    UNIQUE (email, form_timestamp)
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_at);
+"""
+# Columns added after the first release, applied to older databases on open
+MIGRATED_COLUMNS = {
+    "dm_attempts": "INTEGER NOT NULL DEFAULT 0",
+    "dm_next_at": "REAL NOT NULL DEFAULT 0",
+    "dm_error": "TEXT",
+}
+CHANGE_LOG_KEEP = 10000  # Change rows kept after pruning; indexes further behind do a full reload
+
+
+class VerificationStore:
+    """SQLite store for pending verification codes, shared by the form poller and the bot.
+
+    The database runs in WAL mode so the poller can write while the bot reads. Every
+    change is a single-row statement inside a transaction, and `consume()` deletes a
+    matching code atomically so it can only ever be used once.
+    """
+
+    def __init__(self, path=VERIFICATION_DB):
+        self.path = path
+        self._lock = threading.RLock()
+        self._local_commits = 0
+        self.conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        existing = {row["name"] for row in self.conn.execute("PRAGMA table_info(codes)")}
+        for column, definition in MIGRATED_COLUMNS.items():
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE codes ADD COLUMN {column} {definition}")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _transaction(self):
+        return _Transaction(self)
+
+    @staticmethod
+    def _entry(row):
+        """A row in the same shape verified.json used: {"code", "timestamp", "discord_tag", ...}."""
+        return {
+            "code": row["code"],
+            "timestamp": row["timestamp"],
+            "discord_tag": row["discord_tag"],
+            "dm_sent": bool(row["dm_sent"]),
+            "dm_attempted": bool(row["dm_attempted"]),
+            "dm_attempts": row["dm_attempts"],
+            "dm_next_at": row["dm_next_at"],
+        }
+
+    # ========== Writes ==========
+    def upsert(self, email, code, discord_tag, timestamp=None, dm_sent=False, dm_attempted=False):
+        with self._transaction() as conn:
+            self._upsert(conn, email, code, discord_tag, timestamp, dm_sent, dm_attempted)
+
+    @staticmethod
+    def _upsert(conn, email, code, discord_tag, timestamp=None, dm_sent=False, dm_attempted=False):
+        timestamp = time.time() if timestamp is None else timestamp
+        discord_tag = str(discord_tag)
+        conn.execute(
+            """
+            INSERT INTO codes (email, code, code_lower, discord_tag, tag_lower, timestamp, expires_at, dm_sent, dm_attempted)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(email) DO UPDATE SET
+                code = excluded.code,
+                code_lower = excluded.code_lower,
+                discord_tag = excluded.discord_tag,
+                tag_lower = excluded.tag_lower,
+                timestamp = excluded.timestamp,
+                expires_at = excluded.expires_at,
+                dm_sent = excluded.dm_sent,
+                dm_attempted = excluded.dm_attempted,
+                dm_attempts = 0,
+                dm_next_at = 0,
+                dm_error = NULL
+            """,
+            (email, code, code.lower(), discord_tag, discord_tag.strip().lower(),
+             timestamp, timestamp + CODE_LIFETIME, int(dm_sent), int(dm_attempted))
+        )
+
+    def delete(self, email):
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM codes WHERE email = ?", (email,)).rowcount > 0
+
+    def mark_dm(self, email, sent):
+        """Record the outcome of the reminder DM: sent, or attempted and given up on."""
+        column = "dm_sent" if sent else "dm_attempted"
+        with self._transaction() as conn:
+            conn.execute(f"UPDATE codes SET {column} = 1 WHERE email = ?", (email,))
+
+    def schedule_dm_retry(self, email, next_at, error, count=True):
+        """Hold the entry back until `next_at`, counting a failed DM attempt unless `count` is False."""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE codes SET dm_attempts = dm_attempts + ?, dm_next_at = ?, dm_error = ? WHERE email = ?",
+                (int(count), next_at, error, email)
+            )
+
+    def consume(self, code, discord_tag, now=None):
+        """Atomically delete and return the email for an unexpired (code, tag) match, else None."""
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT email FROM codes WHERE code_lower = ? AND tag_lower = ? AND expires_at > ?",
+                (code.lower(), discord_tag.strip().lower(), now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM codes WHERE email = ?", (row["email"],))
+            return row["email"]
+
+    def delete_expired(self, now=None):
+        """Delete every code past its expiry and return the affected emails."""
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            emails = [row["email"] for row in conn.execute(
+                "SELECT email FROM codes WHERE expires_at <= ?", (now,)
+            )]
+            conn.execute("DELETE FROM codes WHERE expires_at <= ?", (now,))
+            return emails
+
+    # ========== Email Outbox ==========
+    def enqueue_email(self, email, form_timestamp, discord_tag, code, now=None):
+        """Queue a verification email for one form submission.
+
+        Idempotent on (email, form_timestamp): re-reading a row that's already queued,
+        sent or dead returns False and leaves it alone.
+        """
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            return conn.execute(
+                """
+                INSERT OR IGNORE INTO outbox (email, form_timestamp, discord_tag, code, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (email, form_timestamp, str(discord_tag), code, now)
+            ).rowcount > 0
+
+    def due_emails(self, now=None, limit=50):
+        """Pending outbox rows whose next attempt is due, oldest first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM outbox WHERE status = 'pending' AND next_at <= ? ORDER BY id LIMIT ?",
+                (now, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def next_email_due(self):
+        """Earliest next_at among pending outbox rows, or None."""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT MIN(next_at) FROM outbox WHERE status = 'pending'"
+            ).fetchone()[0]
+
+    def email_sent(self, outbox_id, now=None):
+        """Mark an outbox row sent and make its code live, in one transaction."""
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT * FROM outbox WHERE id = ? AND status = 'pending'", (outbox_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            conn.execute("UPDATE outbox SET status = 'sent', updated_at = ? WHERE id = ?", (now, outbox_id))
+            self._upsert(conn, row["email"], row["code"], row["discord_tag"], timestamp=now)
+            return True
+
+    def email_failed(self, outbox_id, error, next_at, dead=False, now=None):
+        """Count a failed send; retry at `next_at`, or park the row as dead."""
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                UPDATE outbox SET attempts = attempts + 1, last_error = ?, next_at = ?,
+                    status = CASE WHEN ? THEN 'dead' ELSE status END, updated_at = ?
+                WHERE id = ? AND status = 'pending'
+                """,
+                (error, next_at, int(dead), now, outbox_id)
+            )
+
+    def outbox_counts(self):
+        with self._lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+
+    def prune_outbox(self, keep=OUTBOX_KEEP, now=None):
+        """Forget sent and dead rows older than `keep` seconds."""
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            return conn.execute(
+                "DELETE FROM outbox WHERE status != 'pending' AND updated_at < ?", (now - keep,)
+            ).rowcount
+
+    # ========== Reads ==========
+    def get(self, email):
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM codes WHERE email = ?", (email,)).fetchone()
+        return self._entry(row) if row else None
+
+    def find(self, code, discord_tag, now=None):
+        """Email for an unexpired (code, tag) match without consuming it, else None."""
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT email FROM codes WHERE code_lower = ? AND tag_lower = ? AND expires_at > ?",
+                (code.lower(), discord_tag.strip().lower(), now)
+            ).fetchone()
+        return row["email"] if row else None
+
+    def next_expiry(self):
+        """Earliest expires_at still stored, or None. Served from the codes_by_expiry index."""
+        with self._lock:
+            return self.conn.execute("SELECT MIN(expires_at) FROM codes").fetchone()[0]
+
+    def pending_dms(self, now=None):
+        """(email, entry) pairs whose reminder DM is due and hasn't been sent or given up on."""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM codes WHERE dm_sent = 0 AND dm_attempted = 0 AND tag_lower != '' AND dm_next_at <= ?",
+                (now,)
+            ).fetchall()
+        return [(row["email"], self._entry(row)) for row in rows]
+
+    def all(self):
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM codes").fetchall()
+        return {row["email"]: self._entry(row) for row in rows}
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM codes").fetchone()[0]
+
+    # ========== Change Tracking ==========
+    def version(self):
+        """Cheap token that changes whenever any connection commits a write.
+
+        PRAGMA data_version only moves for other connections' commits, so our own
+        commits are counted separately.
+        """
+        with self._lock:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0], self._local_commits
+
+    def changes_since(self, seq):
+        """(latest seq, oldest seq still logged, emails changed after `seq`)."""
+        with self._lock:
+            latest, oldest = self.conn.execute("SELECT MAX(seq), MIN(seq) FROM changes").fetchone()
+            emails = {row["email"] for row in self.conn.execute(
+                "SELECT DISTINCT email FROM changes WHERE seq > ?", (seq,)
+            )}
+        return latest or seq, oldest, emails
+
+    def prune_changes(self, keep=CHANGE_LOG_KEEP):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?", (keep,))
+
+    def rows(self, emails=None):
+        """Raw (email, code_lower, tag_lower, expires_at) rows, optionally for some emails only."""
+        with self._lock:
+            if emails is None:
+                return self.conn.execute("SELECT email, code_lower, tag_lower, expires_at FROM codes").fetchall()
+            emails = list(emails)
+            rows = []
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(emails), 500):
+                chunk = emails[i:i + 500]
+                rows.extend(self.conn.execute(
+                    f"SELECT email, code_lower, tag_lower, expires_at FROM codes WHERE email IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ))
+            return rows
+
+    # ========== Migration ==========
+    def migrate_json(self, json_path=LEGACY_VERIFIED_FILE, backup_path=LEGACY_BACKUP_FILE):
+        """One-shot import of verified.json into the database.
+
+        The backup is the file's previous version, so it can still hold codes that were
+        already used; it is only read when verified.json is missing or unreadable. The
+        migration is recorded in the meta table and never runs twice; the JSON files are
+        left in place for reference. Returns the number of entries imported.
+        """
+        with self._lock:
+            done = self.conn.execute("SELECT value FROM meta WHERE key = 'migrated_json'").fetchone()
+        if done:
+            return 0
+
+        merged = {}
+        for path in (json_path, backup_path):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                continue
+            except json.JSONDecodeError as e:
+                print(f"⚠️ Skipping unreadable {path} during migration: {e}")
+                continue
+            for email, entry in data.items():
+                if isinstance(entry, dict) and "code" in entry and "timestamp" in entry:
+                    merged[email] = entry
+                else:
+                    print(f"⚠️ Skipping invalid entry for {email} in {path}")
+            break
+
+        imported = 0
+        with self._transaction() as conn:
+            for email, entry in merged.items():
+                # get_all_records() turned all-digit usernames (and codes) into ints
+                tag = str(entry.get("discord_tag", ""))
+                code = str(entry["code"])
+                try:
+                    timestamp = float(entry["timestamp"])
+                    conn.execute(
+                        """
+                        INSERT OR REPLACE INTO codes
+                            (email, code, code_lower, discord_tag, tag_lower, timestamp, expires_at, dm_sent, dm_attempted)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        (str(email), code, code.lower(), tag, tag.strip().lower(),
+                         timestamp, timestamp + CODE_LIFETIME,
+                         int(bool(entry.get("dm_sent"))), int(bool(entry.get("dm_attempted"))))
+                    )
+                except (TypeError, ValueError, sqlite3.Error) as e:
+                    # One bad entry must not roll back the rest and block every later start
+                    print(f"⚠️ Skipping entry for {email} that couldn't be imported: {e}")
+                    continue
+                imported += 1
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_json', ?)", (str(time.time()),))
+        if imported:
+            print(f"📦 Migrated {imported} verification codes from JSON into {self.path}")
+        return imported
+
+
+class _Transaction:
+    """`with store._transaction() as conn:` runs the block in BEGIN IMMEDIATE ... COMMIT."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __enter__(self):
+        self.store._lock.acquire()
+        self.store.conn.execute("BEGIN IMMEDIATE")
+        return self.store.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.store.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+            if not exc_type:
+                self.store._local_commits += 1
+        finally:
+            self.store._lock.release()
+        return False
+
+
+class CodeIndex:
+    """In-memory (code.lower(), discord_tag.lower()) -> email map for /verify.
+
+    `refresh()` first compares the store's version token, so an unchanged database
+    costs one PRAGMA. When something did change, only the emails recorded in the change
+    log since the last refresh are re-read. If the log was pruned past our position,
+    the whole index is reloaded.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.by_key = {}
+        self.by_email = {}
+        self.seq = 0
+        self._version = None
+        self.reload()
+
+    def reload(self):
+        self._version = self.store.version()
+        self.seq, _, _ = self.store.changes_since(0)
+        self.by_key = {}
+        self.by_email = {}
+        for row in self.store.rows():
+            self._add(row)
+
+    def _add(self, row):
+        key = (row["code_lower"], row["tag_lower"])
+        self.by_key[key] = row["email"]
+        self.by_email[row["email"]] = (key, row["expires_at"])
+
+    def _remove(self, email):
+        old = self.by_email.pop(email, None)
+        if old is not None and self.by_key.get(old[0]) == email:
+            del self.by_key[old[0]]
+
+    def refresh(self):
+        version = self.store.version()
+        if version == self._version:
+            return
+        latest, oldest, emails = self.store.changes_since(self.seq)
+        if oldest is not None and oldest > self.seq + 1:
+            self.reload()
+            return
+        self._version = version
+        self.seq = latest
+        for email in emails:
+            self._remove(email)
+        for row in self.store.rows(emails):
+            self._add(row)
+
+    def lookup(self, code, discord_tag, now=None):
+        """Email for an unexpired (code, tag) match, else None. O(1) once refreshed."""
+        self.refresh()
+        email = self.by_key.get((code.lower(), discord_tag.strip().lower()))
+        if email is None:
+            return None
+        now = time.time() if now is None else now
+        return email if self.by_email[email][1] > now else None
+
+
+def open_store(path=VERIFICATION_DB):
+    """Open the shared store, importing the legacy JSON files the first time."""
+    store = VerificationStore(path)
+    store.migrate_json()
+    return store